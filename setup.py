@@ -13,24 +13,28 @@
 
 from setuptools import setup, find_packages
 import os
-from pathlib import Path
 
-# 現在のディレクトリ取得
-here = Path(__file__).parent.absolute()
+# 現在のディレクトリ取得（Pathオブジェクトを作らず文字列のまま扱う）
+here = os.path.dirname(os.path.abspath(__file__))
 
 # README.mdからlong_descriptionを取得（存在する場合）
+# 存在確認（stat）と読み込みを分けず、openの失敗で「存在しない」を判定する
 long_description = ""
-readme_path = here / "README.md"
-if readme_path.exists():
+readme_path = os.path.join(here, "README.md")
+try:
     with open(readme_path, encoding="utf-8") as f:
         long_description = f.read()
+except FileNotFoundError:
+    pass
 
 # requirements.txtから依存関係を取得（存在する場合）
 requirements = []
-requirements_path = here / "requirements.txt"
-if requirements_path.exists():
+requirements_path = os.path.join(here, "requirements.txt")
+try:
     with open(requirements_path, encoding="utf-8") as f:
         requirements = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+except FileNotFoundError:
+    pass
 
 setup(
     # パッケージ基本情報
@@ -48,12 +52,14 @@ setup(
     },
     
     # パッケージ構成
-    packages=find_packages(),
+    # 探索対象をtoolsパッケージに限定し、docsや.tasks等のディレクトリを走査しないようにする
+    packages=find_packages(include=["tools", "tools.*"], exclude=["tests", "docs", ".tasks*"]),
     py_modules=[],
     include_package_data=True,
     
     # Pythonバージョン要件
-    python_requires=">=3.8",
+    # pyproject.tomlのrequires-pythonと同じ値にする
+    python_requires=">=3.11",
     
     # 依存関係
     install_requires=requirements,
@@ -85,9 +91,6 @@ setup(
         "Topic :: Software Development :: Build Tools",
         "License :: OSI Approved :: MIT License",
         "Programming Language :: Python :: 3",
-        "Programming Language :: Python :: 3.8",
-        "Programming Language :: Python :: 3.9",
-        "Programming Language :: Python :: 3.10",
         "Programming Language :: Python :: 3.11",
         "Programming Language :: Python :: 3.12",
         "Operating System :: OS Independent",
@@ -0,0 +1,36 @@
+"""
+タスクワーカー（tools/task_worker.py）のテスト
+"""
+
+import json
+
+from tools.task_worker import contains_usage_limit, is_retryable_query_error
+
+
+def test_contains_usage_limit_lowercase():
+    """小文字の語句を検出する"""
+    assert contains_usage_limit("Claude AI usage limit reached|1700000000")
+    assert contains_usage_limit("rate limit exceeded")
+
+
+def test_contains_usage_limit_mixed_case():
+    """大文字・小文字が混在した語句も、小文字に変換した場合と同様に検出する"""
+    assert contains_usage_limit("Usage LIMit reached")
+    assert contains_usage_limit("USAGE LIMIT REACHED")
+    assert contains_usage_limit("Rate LiMIT exceeded")
+
+
+def test_contains_usage_limit_not_found():
+    """語句を含まないテキスト、および「limit」のみを含むテキストは検出しない"""
+    assert not contains_usage_limit("タスクを完了しました")
+    assert not contains_usage_limit("")
+    assert not contains_usage_limit("The LIMIT of the function is 0")
+
+
+def test_is_retryable_query_error():
+    """JSONの解析失敗はリトライ可能とし、例外グループは含まれる例外で判定する"""
+    json_error = json.JSONDecodeError("bad", "x", 0)
+    assert is_retryable_query_error(json_error)
+    assert is_retryable_query_error(ExceptionGroup("TaskGroup", [RuntimeError("a"), json_error]))
+    assert not is_retryable_query_error(RuntimeError("cli failed to start"))
+    assert not is_retryable_query_error(ExceptionGroup("TaskGroup", [RuntimeError("a")]))
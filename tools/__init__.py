@@ -24,9 +24,22 @@ __version__ = "0.1.0"
 __author__ = "Claude Code"
 __email__ = "noreply@anthropic.com"
 
-# 主要クラスをパッケージレベルでインポート可能にする
-from .task_master import TaskMaster
-from .task_worker import TaskWorker
+
+def __getattr__(name):
+    """
+    主要クラスをパッケージレベルで遅延インポートする（PEP 562）
+    
+    task-creator等の単体ツール起動時に、使わないtask_master/task_workerの
+    インポートコストを払わないよう、実際に参照されたときに初めて読み込む。
+    """
+    if name == "TaskMaster":
+        from .task_master import TaskMaster
+        return TaskMaster
+    if name == "TaskWorker":
+        from .task_worker import TaskWorker
+        return TaskWorker
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 # __all__でエクスポートするシンボルを明示的に定義
 __all__ = [
@@ -18,13 +18,52 @@
 5. 各ターゲットに対するタスクプロンプトの生成・出力
 """
 
+import io
 import os
+import re
 import sys
-import argparse
 import shutil
+import string
+import tarfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 
+# タスクプロンプトファイルを作成する際のフラグとパーミッション
+# 既存ファイルは上書きする（open(..., 'w')と同じ挙動）
+TASK_FILE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+TASK_FILE_MODE = 0o644
+
+# ファイル名に使えない文字（英数字・「._-」以外）にマッチする正規表現
+# \wはUnicodeの英数字（str.isalnum()がTrueになる文字）とアンダースコアにマッチするため、
+# 日本語などの非ASCIIの英数字はこれまでどおりファイル名に残す（NFKC正規化は行わない）
+_UNSAFE_FILENAME_CHARS = re.compile(r'[^\w.-]+')
+
+# ASCIIのみのターゲットエントリ用の削除テーブル（英数字・「._-」以外のASCII文字を削除）
+# ASCII文字列ではstr.translate()の方が正規表現より軽量なため、こちらを優先して使う
+_ASCII_SAFE_FILENAME_CHARS = frozenset(string.ascii_letters + string.digits + "._-")
+_ASCII_UNSAFE_FILENAME_TABLE = {
+    i: None for i in range(128) if chr(i) not in _ASCII_SAFE_FILENAME_CHARS
+}
+
+# --archiveオプション指定時に.tasks/pending/に出力するアーカイブファイル名
+# タスク管理マスタは起動時にこのアーカイブを個別のタスクファイルに展開する
+# （tools/task_master.pyもこの定義をインポートして使う）
+TASK_ARCHIVE_NAME = "tasks.tar"
+
+# アーカイブ書き込み時のバッファサイズ（256 KiB）
+TASK_ARCHIVE_BUFSIZE = 1 << 18
+
+# 複数のバッファを1回のシステムコールでまとめて書き込む関数
+# os.writev()が使えない環境（Windows）では、連結してからos.write()で書き込む
+if hasattr(os, "writev"):
+    _writev = os.writev
+else:
+    def _writev(fd, buffers):
+        return os.write(fd, b"".join(buffers))
+
+
 def clear_tasks_directory(root_dir):
     """
     .tasks/ディレクトリを削除する
@@ -55,18 +94,19 @@ def create_task_directories(root_dir):
     Args:
         root_dir (str): ルートディレクトリのパス
     """
-    # ルートディレクトリ配下の.tasksディレクトリとその下のサブディレクトリを作成
+    # ルートディレクトリ配下の.tasksディレクトリを作成
+    # 親ディレクトリを辿る必要があるのは.tasks自体だけなので、makedirsはここで1回だけ使う
     tasks_root = os.path.join(root_dir, ".tasks")
-    task_dirs = [
-        tasks_root,
-        os.path.join(tasks_root, "pending"),
-        os.path.join(tasks_root, "working"), 
-        os.path.join(tasks_root, "done"),
-        os.path.join(tasks_root, "failed")
-    ]
-    
-    for dir_path in task_dirs:
-        os.makedirs(dir_path, exist_ok=True)
+    os.makedirs(tasks_root, exist_ok=True)
+    print(f"ディレクトリを作成しました: {tasks_root}")
+    
+    # サブディレクトリは親が確定しているので、単一のmkdirで作成する（既存ならそのまま）
+    for subdir in ("pending", "working", "done", "failed"):
+        dir_path = os.path.join(tasks_root, subdir)
+        try:
+            os.mkdir(dir_path)
+        except FileExistsError:
+            pass
         print(f"ディレクトリを作成しました: {dir_path}")
 
 
@@ -87,17 +127,16 @@ def read_business_prompt(prompt_file_path):
         FileNotFoundError: ファイルが存在しない場合
         Exception: ファイル読み込みエラー
     """
-    try:
-        with open(prompt_file_path, 'r', encoding='utf-8') as f:
-            content = f.read().strip()
-        print(f"業務プロンプトを読み込みました: {prompt_file_path}")
-        return content
-    except FileNotFoundError:
-        print(f"エラー: 業務プロンプトファイルが見つかりません: {prompt_file_path}")
-        raise
-    except Exception as e:
-        print(f"エラー: 業務プロンプトファイルの読み込みに失敗しました: {e}")
-        raise
+    # 読み込みエラーはそのまま呼び出し元（main()）に伝播させ、そこでまとめて表示する
+    # ファイル全体をバイナリモードで一度に読み込み、UTF-8デコードは1回だけ行う
+    # （TextIOWrapperの逐次デコード・改行変換の層を経由しない）
+    # 改行コードはテキストモードと同様に\nに揃え、生成されるタスクプロンプトの内容は変えない
+    content = Path(prompt_file_path).read_bytes().decode('utf-8')
+    if '\r' in content:
+        content = content.replace('\r\n', '\n').replace('\r', '\n')
+    content = content.strip()
+    print(f"業務プロンプトを読み込みました: {prompt_file_path}")
+    return content
 
 
 def read_target_list(target_list_path):
@@ -117,22 +156,38 @@ def read_target_list(target_list_path):
         FileNotFoundError: ファイルが存在しない場合
         Exception: ファイル読み込みエラー
     """
-    try:
-        with open(target_list_path, 'r', encoding='utf-8') as f:
-            lines = [line.strip() for line in f.readlines() if line.strip()]
-        print(f"ターゲットリストを読み込みました: {target_list_path} ({len(lines)}件)")
-        return lines
-    except FileNotFoundError:
-        print(f"エラー: ターゲットリストファイルが見つかりません: {target_list_path}")
-        raise
-    except Exception as e:
-        print(f"エラー: ターゲットリストファイルの読み込みに失敗しました: {e}")
-        raise
+    # 読み込みエラーはそのまま呼び出し元（main()）に伝播させ、そこでまとめて表示する
+    # ファイル全体をバイナリモードで一度に読み込み、UTF-8デコードは1回だけ行う
+    # テキストモードの改行変換（\r\n・\rを\nに変換）の代わりに\rを\nに置き換えてから分割する
+    # （\r\nは空行が1つ増えるだけで、空行は除外されるので結果は変わらない）
+    content = Path(target_list_path).read_bytes().decode('utf-8')
+    # strip()は1行につき1回だけ行い、空行を除外する
+    lines = [stripped for line in content.replace('\r', '\n').split('\n') if (stripped := line.strip())]
+    print(f"ターゲットリストを読み込みました: {target_list_path} ({len(lines)}件)")
+    return lines
 
 
-def generate_task_prompt(business_prompt, target_entry):
+def make_task_prompt_parts(business_prompt):
     """
-    個別のタスクプロンプトを生成する
+    タスクプロンプトのテンプレートを、ターゲットエントリの前後で分割して返す
+    
+    ドキュメント対応箇所：docs/タスク生成ツール.md 17-21行目
+    
+    Args:
+        business_prompt (str): 業務プロンプトの内容
+        
+    Returns:
+        tuple: (prefix, suffix)。タスクプロンプトは「prefix + エントリ + suffix」となる
+    """
+    # ドキュメントで指定されたテンプレートを、ターゲットエントリの位置で前後に分割して事前生成
+    prefix = f"あなたは、有能なビジネスマンです。上司から、「{business_prompt}」というミッションを与えられました。一緒に与えられたリストを複数のビジネスマンが分担して取り組みます。あなたが割り当てられたのは、"
+    suffix = "です。上司からの指示に従ってミッションを実行してください。"
+    return prefix, suffix
+
+
+def make_task_prompt_generator(business_prompt):
+    """
+    業務プロンプトを埋め込んだタスクプロンプト生成関数を作成する
     
     ドキュメント対応箇所：docs/タスク生成ツール.md 17-21行目
     テンプレート：
@@ -141,6 +196,32 @@ def generate_task_prompt(business_prompt, target_entry):
     取り組みます。あなたが割り当てられたのは、＜ターゲットリストのエントリ＞です。
     上司からの指示に従ってミッションを実行してください。」
     
+    業務プロンプトは全ターゲットで共通のため、テンプレートのうち
+    ＜ターゲットリストのエントリ＞より前（prefix）と後ろ（suffix）を1回だけ組み立てておき、
+    ターゲットごとには「prefix + エントリ + suffix」の連結だけを行う。
+    
+    Args:
+        business_prompt (str): 業務プロンプトの内容
+        
+    Returns:
+        callable: ターゲットリストの1エントリを受け取り、タスクプロンプト（str）を返す関数
+    """
+    prefix, suffix = make_task_prompt_parts(business_prompt)
+    
+    def generate(target_entry):
+        return prefix + target_entry + suffix
+    
+    return generate
+
+
+def generate_task_prompt(business_prompt, target_entry):
+    """
+    個別のタスクプロンプトを生成する
+    
+    ドキュメント対応箇所：docs/タスク生成ツール.md 17-21行目
+    複数のターゲットに対して生成する場合は、make_task_prompt_generator()で
+    生成関数を1回だけ作成して使い回すこと。
+    
     Args:
         business_prompt (str): 業務プロンプトの内容
         target_entry (str): ターゲットリストの1エントリ
@@ -148,13 +229,31 @@ def generate_task_prompt(business_prompt, target_entry):
     Returns:
         str: 生成されたタスクプロンプト
     """
-    # ドキュメントで指定されたテンプレートに従ってタスクプロンプトを生成
-    task_prompt = f"""あなたは、有能なビジネスマンです。上司から、「{business_prompt}」というミッションを与えられました。一緒に与えられたリストを複数のビジネスマンが分担して取り組みます。あなたが割り当てられたのは、{target_entry}です。上司からの指示に従ってミッションを実行してください。"""
+    return make_task_prompt_generator(business_prompt)(target_entry)
+
+
+def make_task_filename(target_entry, index):
+    """
+    タスクプロンプトファイルのファイル名を生成する
     
-    return task_prompt
+    Args:
+        target_entry (str): ターゲットエントリ
+        index (int): インデックス番号
+        
+    Returns:
+        str: ファイル名（task_<3桁番号>_<安全な文字のみのエントリ>.txt）
+    """
+    # ターゲットエントリから不正な文字を除去してファイル名にする
+    # 1文字ずつPythonで判定せず、ASCIIのみならstr.translate()、
+    # 非ASCII文字を含む場合はコンパイル済み正規表現で一括除去する
+    if target_entry.isascii():
+        safe_target = target_entry.translate(_ASCII_UNSAFE_FILENAME_TABLE)[:50]
+    else:
+        safe_target = _UNSAFE_FILENAME_CHARS.sub('', target_entry)[:50]
+    return f"task_{index:03d}_{safe_target}.txt"
 
 
-def write_task_prompt_file(task_prompt, target_entry, index, root_dir):
+def write_task_prompt_file(task_prompt, target_entry, index, pending_dir):
     """
     タスクプロンプトをファイルに出力する
     
@@ -163,30 +262,87 @@ def write_task_prompt_file(task_prompt, target_entry, index, root_dir):
     .tasks/pending/の下にテキストファイルとして出力する。」
     
     Args:
-        task_prompt (str): タスクプロンプトの内容
+        task_prompt (str | tuple): タスクプロンプトの内容。
+            UTF-8エンコード済みのバイト列のタプル（prefix, エントリ, suffix）も受け付ける
         target_entry (str): ターゲットエントリ（ファイル名生成用）
         index (int): インデックス番号（ファイル名生成用）
-        root_dir (str): ルートディレクトリのパス
+        pending_dir (str): 出力先の.tasks/pending/ディレクトリのパス
         
     Returns:
         str: 作成されたファイルのパス
     """
     # ファイル名の生成（安全な文字のみ使用）
-    # ターゲットエントリから不正な文字を除去してファイル名にする
-    safe_target = "".join(c for c in target_entry if c.isalnum() or c in "._-")[:50]
-    filename = f"task_{index:03d}_{safe_target}.txt"
-    file_path = os.path.join(root_dir, ".tasks", "pending", filename)
+    filename = make_task_filename(target_entry, index)
+    # pending_dirは呼び出し元で1回だけ組み立てたものを使い、ここではファイル名を連結するだけにする
+    file_path = pending_dir + os.sep + filename
     
     try:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(task_prompt)
-        print(f"タスクプロンプトファイルを作成しました: {file_path}")
+        # 生のファイルディスクリプタに直接書き込む
+        # バイト列のタプルが渡された場合は、連結せずにwritev(2)で1回のシステムコールにまとめて書く
+        # （共通のprefix/suffixは呼び出し元で1回だけエンコードしたものが渡される）
+        # ファイルごとのログ出力は行わず、呼び出し元でまとめて報告する
+        if isinstance(task_prompt, str):
+            task_prompt = (task_prompt.encode('utf-8'),)
+        buffers = [memoryview(buffer) for buffer in task_prompt]
+        fd = os.open(file_path, TASK_FILE_FLAGS, TASK_FILE_MODE)
+        try:
+            # 書き込みは途中で終わる可能性があるため、書き込み済みのバッファを除いて続けて書く
+            while buffers:
+                written = _writev(fd, buffers)
+                while buffers and written >= len(buffers[0]):
+                    written -= len(buffers[0])
+                    buffers.pop(0)
+                if written:
+                    buffers[0] = buffers[0][written:]
+        finally:
+            os.close(fd)
         return file_path
     except Exception as e:
         print(f"エラー: タスクプロンプトファイルの作成に失敗しました: {e}")
         raise
 
 
+def write_task_archive(task_entries, pending_dir):
+    """
+    全タスクプロンプトを1つのtarアーカイブにまとめて出力する
+    
+    ターゲットごとに小さなファイルを作成すると、ファイル作成・クローズや
+    ディレクトリ更新などのメタデータ処理が件数分発生する。
+    --archiveオプション指定時は、全タスクを.tasks/pending/tasks.tarに
+    順次書き込みでまとめて出力する。アーカイブ内のメンバー名は、
+    通常モードで作成されるファイル名と同じ。
+    
+    Args:
+        task_entries (list): (インデックス, ターゲットエントリ, タスクプロンプト)のリスト。
+            タスクプロンプトはstr、またはUTF-8エンコード済みのバイト列のタプル
+        pending_dir (str): 出力先の.tasks/pending/ディレクトリのパス
+        
+    Returns:
+        list: アーカイブに格納したメンバー名のリスト
+    """
+    archive_path = pending_dir + os.sep + TASK_ARCHIVE_NAME
+    member_names = []
+    mtime = time.time()
+    
+    try:
+        with tarfile.open(archive_path, mode='w', bufsize=TASK_ARCHIVE_BUFSIZE) as tf:
+            for index, target_entry, task_prompt in task_entries:
+                if isinstance(task_prompt, str):
+                    data = task_prompt.encode('utf-8')
+                else:
+                    data = b"".join(task_prompt)
+                info = tarfile.TarInfo(name=make_task_filename(target_entry, index))
+                info.size = len(data)
+                info.mtime = mtime
+                info.mode = TASK_FILE_MODE
+                tf.addfile(info, io.BytesIO(data))
+                member_names.append(info.name)
+        return member_names
+    except Exception as e:
+        print(f"エラー: タスクアーカイブの作成に失敗しました: {e}")
+        raise
+
+
 def main():
     """
     メイン処理
@@ -198,6 +354,9 @@ def main():
     なお、デフォルトのルートディレクトリはtoolsの一つ上のディレクトリとする。」
     """
     # コマンドライン引数の解析
+    # argparseはCLI起動時にしか使わないため、モジュールのインポート時には読み込まない
+    import argparse
+    
     parser = argparse.ArgumentParser(
         description="タスク生成ツール - 業務プロンプトとターゲットリストから個別タスクを生成",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -213,6 +372,8 @@ def main():
 オプション:
   --root-dir:          ルートディレクトリのパス（デフォルト：カレントディレクトリ）
   --clear:             起動時に.tasks/ディレクトリを削除する
+  --quiet:             タスクプロンプト生成中の進捗表示を行わない
+  --archive:           タスクを個別ファイルではなく.tasks/pending/tasks.tarにまとめて出力する
         """
     )
     
@@ -244,6 +405,21 @@ def main():
         help='.tasks/ディレクトリを起動時に削除する'
     )
     
+    # 大量のターゲットを処理する場合に、進捗表示による標準出力への書き込みを抑止する
+    parser.add_argument(
+        '--quiet',
+        action='store_true',
+        help='タスクプロンプト生成中の進捗表示を行わない'
+    )
+    
+    # 大量のターゲットを処理する場合に、小さなファイルを大量に作る代わりに
+    # 1つのtarアーカイブにまとめて出力する（タスク管理マスタが起動時に展開する）
+    parser.add_argument(
+        '--archive',
+        action='store_true',
+        help='タスクを.tasks/pending/tasks.tarにまとめて出力する'
+    )
+    
     args = parser.parse_args()
     
     try:
@@ -252,6 +428,7 @@ def main():
         print(f"ターゲットリストファイル: {args.target_list_file}")
         print(f"ルートディレクトリ: {args.root_dir}")
         print(f"--clearオプション: {args.clear}")
+        print(f"--archiveオプション: {args.archive}")
         print()
         
         # Step 0: --clearオプションが指定された場合、.tasks/ディレクトリを削除
@@ -279,27 +456,61 @@ def main():
         
         # Step 4: 各ターゲットに対してタスクプロンプトを生成・出力
         print("4. タスクプロンプトを生成中...")
+        
+        # 先に全ターゲットのタスクプロンプトを準備しておき、
+        # ファイル書き込みはログ出力を挟まない短いループでまとめて行う
+        # 業務プロンプト部分（prefix/suffix）は全ターゲットで共通なので、UTF-8エンコードは1回だけ行い、
+        # ターゲットごとにはエントリのみをエンコードする（文字列の連結は行わない）
+        prefix, suffix = make_task_prompt_parts(business_prompt)
+        prefix_bytes = prefix.encode('utf-8')
+        suffix_bytes = suffix.encode('utf-8')
+        task_entries = [
+            (index, target_entry, (prefix_bytes, target_entry.encode('utf-8'), suffix_bytes))
+            for index, target_entry in enumerate(target_list, 1)
+        ]
+        
+        # 進捗表示は全体の約1%ごとに1行を上書き表示する（--quiet指定時は表示しない）
+        total = len(task_entries)
+        progress_step = max(1, total // 100)
+        # 出力先ディレクトリのパスは全ファイル共通なので1回だけ組み立てる
+        pending_dir = os.path.join(args.root_dir, ".tasks", "pending")
         created_files = []
         
-        for index, target_entry in enumerate(target_list, 1):
-            print(f"  処理中 ({index}/{len(target_list)}): {target_entry}")
-            
-            # タスクプロンプトを生成
-            task_prompt = generate_task_prompt(business_prompt, target_entry)
-            
-            # ファイルに出力
-            file_path = write_task_prompt_file(task_prompt, target_entry, index, args.root_dir)
-            created_files.append(file_path)
+        if args.archive:
+            # --archive指定時は1つのtarアーカイブに順次書き込む
+            created_files = write_task_archive(task_entries, pending_dir)
+            print(f"タスクアーカイブを作成しました: {pending_dir + os.sep + TASK_ARCHIVE_NAME}")
+        else:
+            # 各ファイルの書き込みは互いに独立しているため、スレッドプールで並列に行う
+            # （os.write中はGILが解放されるので、書き込みのシステムコールを重ね合わせられる）
+            # ex.mapは入力順に結果を返すので、進捗表示と作成ファイル一覧の順序は従来どおり
+            max_workers = min(32, (os.cpu_count() or 1) * 4)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                results = executor.map(
+                    lambda entry: write_task_prompt_file(entry[2], entry[1], entry[0], pending_dir),
+                    task_entries
+                )
+                for index, file_path in enumerate(results, 1):
+                    created_files.append(file_path)
+                    if not args.quiet and (index % progress_step == 0 or index == total):
+                        sys.stdout.write(f"\r  処理中 ({index}/{total})")
+                        sys.stdout.flush()
+            if not args.quiet and total:
+                sys.stdout.write("\n")
+        print(f"タスクプロンプトファイルを作成しました: {len(created_files)}件")
         
         print()
         print("=== タスク生成完了 ===")
         print(f"生成されたタスク数: {len(created_files)}件")
-        print(f"出力ディレクトリ: {os.path.join(args.root_dir, '.tasks', 'pending')}")
+        print(f"出力ディレクトリ: {pending_dir}")
         print()
         print("次の手順:")
         print(f"1. タスク管理マスタを起動: python task_master.py --root-dir {args.root_dir}")
         print("2. タスクワーカーを起動: python task_worker.py")
         
+    except FileNotFoundError as e:
+        print(f"エラー: ファイルが見つかりません: {e.filename}")
+        sys.exit(1)
     except Exception as e:
         print(f"エラー: {e}")
         sys.exit(1)
@@ -13,19 +13,42 @@
 """
 
 import argparse
+import collections
+import heapq
+import itertools
 import json
 import logging
 import os
-import random
+import queue
+import re
+import selectors
 import signal
 import socket
+import struct
 import sys
+import tarfile
 import threading
 import time
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
+# orjsonの導入（任意。インストールされていればワーカーからのメッセージのJSON解析に使う）
+# （tools/task_worker.pyと同じ。送信側はテンプレートへの埋め込みで変換するため使わない）
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# タスク生成ツールの--archiveオプションで出力されるタスクアーカイブのファイル名
+# （タスク生成ツールと同じ値を使うため、定義はtools/task_creator.pyの1か所のみとする）
+# パッケージとしてではなくスクリプトとして直接実行された場合は、同じディレクトリのモジュールとして読み込む
+try:
+    from .task_creator import TASK_ARCHIVE_NAME
+except ImportError:
+    from task_creator import TASK_ARCHIVE_NAME
+
 
 # ログ設定
 logging.basicConfig(
@@ -34,6 +57,126 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# TCP通信時のメッセージのフレームヘッダ（JSON本体のバイト長、4バイトのビッグエンディアン）
+# （tools/task_worker.pyのMESSAGE_HEADERと同じ。docs/メッセージフォーマット.md参照）
+MESSAGE_HEADER = struct.Struct(">I")
+
+# 受信を許容するメッセージ本体の最大バイト長
+# フレーム形式でないデータを受信した場合に、不正な長さのまま受信を待ち続けないようにする
+MAX_MESSAGE_SIZE = 64 * 1024 * 1024
+
+# ワーカーとのソケットのSO_RCVBUF/SO_SNDBUFは設定しない
+# 固定値を設定するとLinuxのTCPバッファ自動調整（autotuning）が無効になり、
+# RTTの大きい回線ではかえってスループットが落ちるため、カーネルの自動調整に任せる
+# （ソケットのタイムアウトも設定せず、受け入れ時に一度だけノンブロッキングにして、待ちはセレクタで行う）
+
+# リクエストIDの連番
+# 乱数（4桁）では応答待ちのリクエスト同士でIDが衝突し得るため、プロセス内で一意な連番を使う
+# （next()はC実装で、GILの下でアトミックに進むためロックは不要）
+_req_counter = itertools.count(1)
+
+# JSON文字列中でエスケープが必要なバイト（制御文字・ダブルクォート・バックスラッシュ）
+# UTF-8のマルチバイト文字を構成するバイトは全て0x80以上のため、バイト列のまま判定できる
+_JSON_ESCAPE_BYTES = re.compile(rb'[\x00-\x1f"\\]')
+_JSON_ESCAPE_TABLE = {bytes([i]): b'\\u%04x' % i for i in range(0x20)}
+_JSON_ESCAPE_TABLE.update({
+    b'"': b'\\"', b'\\': b'\\\\', b'\n': b'\\n', b'\r': b'\\r', b'\t': b'\\t',
+    b'\b': b'\\b', b'\f': b'\\f',
+})
+
+
+def encode_message(message: dict) -> bytes:
+    """
+    メッセージをTCP送信用のフレームに変換
+    
+    Args:
+        message: 送信するメッセージ
+        
+    Returns:
+        フレームヘッダ（JSON本体のバイト長）とUTF-8エンコードしたJSON本体を連結したバイト列
+    """
+    body = json.dumps(message, ensure_ascii=False).encode('utf-8')
+    return MESSAGE_HEADER.pack(len(body)) + body
+
+
+def decode_message(body: bytes) -> dict:
+    """
+    受信したフレームのJSON本体をメッセージに変換
+    
+    Args:
+        body: UTF-8エンコードされたJSON本体（bytearrayも可）
+        
+    Returns:
+        メッセージ
+        
+    Raises:
+        ValueError: JSONとして解析できない場合
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+# REQUESTメッセージのJSON本体のうち、プロンプトテキストより前の部分
+_REQUEST_BODY_PREFIX = b'{"type":"REQUEST","msg":"'
+
+
+def escape_json_string(data: bytes) -> bytes:
+    """
+    UTF-8のバイト列を、JSON文字列の中身としてそのまま埋め込める形にエスケープ
+    
+    json.dumps(..., ensure_ascii=False)と同じエスケープを、strにデコードせずにバイト列のまま行う。
+    
+    Args:
+        data: UTF-8としてデコード可能なバイト列
+        
+    Returns:
+        エスケープしたバイト列（前後のダブルクォートは含まない）
+    """
+    return _JSON_ESCAPE_BYTES.sub(lambda m: _JSON_ESCAPE_TABLE[m.group()], data)
+
+
+def encode_request_message(req_id: str, escaped_prompt: bytes) -> bytes:
+    """
+    タスク実行依頼（REQUEST）メッセージをTCP送信用のフレームに変換
+    
+    プロンプトテキストはファイルから読み込んだバイト列をescape_json_string()で
+    エスケープしたものを受け取り、strを経由せずにJSON本体に埋め込む。
+    
+    Args:
+        req_id: リクエストID（エスケープ不要な英数字と「_」のみ）
+        escaped_prompt: escape_json_string()でエスケープしたプロンプトテキスト
+        
+    Returns:
+        フレームヘッダとJSON本体を連結したバイト列
+    """
+    suffix = b'","req_id":"' + req_id.encode('ascii') + b'"}'
+    length = len(_REQUEST_BODY_PREFIX) + len(escaped_prompt) + len(suffix)
+    return b"".join((MESSAGE_HEADER.pack(length), _REQUEST_BODY_PREFIX, escaped_prompt, suffix))
+
+
+def encode_check_message(req_id: str) -> bytes:
+    """
+    ヘルスチェック（CHECK）メッセージをTCP送信用のフレームに変換
+    
+    CHECKはreq_id以外が固定のため、json.dumps()を使わずにテンプレートへreq_idを埋め込む。
+    
+    Args:
+        req_id: リクエストID（エスケープ不要な英数字と「_」のみ）
+        
+    Returns:
+        フレームヘッダとJSON本体を連結したバイト列
+    """
+    body = _CHECK_BODY_TEMPLATE % req_id.encode('ascii')
+    return MESSAGE_HEADER.pack(len(body)) + body
+
+
+# 固定内容の制御メッセージ
+# JOIN_ACKは内容が常に同じため、フレーム全体を起動時に一度だけ組み立てておく
+_JOIN_ACK_FRAME = encode_message({"type": "JOIN_ACK", "msg": ""})
+# CHECKはreq_idのみが変わるため、JSON本体をテンプレートとして持つ
+_CHECK_BODY_TEMPLATE = b'{"type":"CHECK","msg":"","req_id":"%s"}'
+
 
 @dataclass
 class RequestInfo:
@@ -49,7 +192,18 @@ class WorkerObject:
     worker_id: str
     current_task_file: str = ""  # 対応中の.tasks/working/のファイル名
     status: str = "idle"  # idle/requesting/working/disconnecting
-    request_infos: List[RequestInfo] = field(default_factory=list)
+    request_infos: Dict[str, RequestInfo] = field(default_factory=dict)  # リクエストID → リクエスト情報
+    send_buffer: bytearray = field(default_factory=bytearray)  # 送信しきれなかったデータ
+    recv_buffer: bytearray = field(default_factory=bytearray)  # 受信途中のメッセージ
+
+
+@dataclass
+class JoiningConnection:
+    """参入待ちの接続 - 接続を受け入れてから参入メッセージ（JOIN）を受信するまでの状態を管理"""
+    socket: socket.socket
+    address: Tuple[str, int]
+    deadline: float  # 参入メッセージの受信期限
+    recv_buffer: bytearray = field(default_factory=bytearray)  # 受信途中の参入メッセージ
 
 
 class TaskMaster:
@@ -66,17 +220,70 @@ class TaskMaster:
         self.port = port
         self.root_dir = Path(root_dir) if root_dir else Path.cwd()
         self.tasks_dir = self.root_dir / ".tasks"
+        # タスクファイルのパス組み立て用に、各ディレクトリのパス（末尾に区切り文字付き）を文字列で保持しておく
+        # タスクの割り当て・完了のたびにPathオブジェクトを生成せず、文字列の連結だけでパスを作る
+        self._pending_prefix = os.path.join(str(self.tasks_dir / "pending"), "")
+        self._working_prefix = os.path.join(str(self.tasks_dir / "working"), "")
+        self._done_prefix = os.path.join(str(self.tasks_dir / "done"), "")
+        self._failed_prefix = os.path.join(str(self.tasks_dir / "failed"), "")
         
         # ディレクトリ構造の確認・作成
         self._ensure_task_directories()
         
+        # タスクアーカイブがあれば個別のタスクファイルに展開
+        self._expand_task_archive()
+        
         # 管理用変数
+        # ワーカーの追加・削除はすべてメインループで行うため、ロックは不要
         self.workers: Dict[str, WorkerObject] = {}
+        # 参入待ちの接続（ソケット → 接続情報）
+        # 参入メッセージの受信も、接続ごとにスレッドを起動せずメインループで行う
+        self.joining: Dict[socket.socket, JoiningConnection] = {}
         self.server_socket: Optional[socket.socket] = None
         self.running = True
-        self.timer_thread: Optional[threading.Thread] = None
-        self.message_queue = []
-        self.message_lock = threading.Lock()
+        # 次にタイマーイベントを処理する時刻（タイマー用のスレッドは起動せず、メインループで判定する）
+        self.timer_interval = 10  # デフォルト設定は10秒ごと
+        self.next_timer_time = time.time() + self.timer_interval
+        # スレッド間メッセージのキュー
+        # dequeのappend()/popleft()はそれぞれアトミックなため、ロックを取らずに追加・取り出しができる
+        # （メインループの待ちは、Eventではなく通知用のソケット対で解除する。select()と同時に待てるため）
+        self.message_queue: collections.deque = collections.deque()
+        
+        # タイムアウト監視用のヒープ（(タイムアウト時刻, リクエストID)をタイムアウト時刻順に保持）
+        # リクエストごとに監視スレッドを起動する代わりに、メインループが期限切れのものを取り出す
+        # メインループからのみ操作するためロックは不要
+        self.timeout_heap: List[Tuple[float, str]] = []
+        
+        # 応答待ちのリクエストID → 送信先のワーカーID
+        # タイムアウト確認時に全ワーカーのリクエスト情報を走査せずに済むようにする
+        # メインループからのみ操作するためロックは不要
+        self.req_owner: Dict[str, str] = {}
+        
+        # 起動後に置かれたタスクアーカイブについて警告済みかどうか（警告は1回のみ出す）
+        self._archive_warned = False
+        
+        # .tasks/pending/内のファイル名の一覧
+        # メインループのたびにディレクトリを走査しないよう、ファイル移動に合わせて更新する
+        # （外部から追加されたファイルを取り込むため、タイマーイベントごとに走査し直す）
+        self.pending_names = set(self._scan_task_dir("pending"))
+        # ファイル入出力スレッドでpendingからworkingへ移動中のファイル名
+        # （移動が終わるまでの間に、pendingの走査結果から再び割り当てられないようにする）
+        self.assigning_names = set()
+        
+        # ファイル入出力スレッドへの依頼キュー
+        # タスクファイルの移動・読み込みはメインループで行わず、このスレッドに任せる
+        self.fs_queue = queue.Queue()
+        self.fs_thread: Optional[threading.Thread] = None
+        
+        # ソケットの読み込み/書き込み可能状態の監視（Linuxではepoll）
+        # サーバーソケットと全ワーカーのソケットを登録し、準備ができたものだけを処理する
+        self.selector = selectors.DefaultSelector()
+        
+        # 別スレッドからメッセージを追加したときに、select()で待っているメインループを起こすためのソケット対
+        self._wakeup_reader, self._wakeup_writer = socket.socketpair()
+        self._wakeup_reader.setblocking(False)
+        self._wakeup_writer.setblocking(False)
+        self.selector.register(self._wakeup_reader, selectors.EVENT_READ, data=None)
         
         # 統計情報
         self.start_time = time.time()
@@ -95,6 +302,61 @@ class TaskMaster:
             dir_path.mkdir(parents=True, exist_ok=True)
             logger.info(f"ディレクトリ確認: {dir_path}")
     
+    def _expand_task_archive(self):
+        """
+        .tasks/pending/tasks.tarを個別のタスクファイルに展開
+        
+        タスク生成ツールを--archiveオプション付きで実行した場合、タスクは
+        1つのtarアーカイブにまとめて出力される。タスクの配布・移動は
+        ファイル単位で行うため、起動時に各メンバーを.tasks/pending/に書き出し、
+        アーカイブ自体は削除する。
+        """
+        pending_dir = self.tasks_dir / "pending"
+        archive_path = pending_dir / TASK_ARCHIVE_NAME
+        if not archive_path.exists():
+            return
+        
+        expanded = 0
+        try:
+            with tarfile.open(archive_path, mode='r') as tf:
+                for member in tf:
+                    # 通常ファイルのみを対象とし、ディレクトリ成分を含む名前は展開しない
+                    if not member.isfile() or os.path.basename(member.name) != member.name:
+                        logger.warning(f"タスクアーカイブ内の不正なメンバーをスキップ: {member.name}")
+                        continue
+                    source = tf.extractfile(member)
+                    (pending_dir / member.name).write_bytes(source.read())
+                    expanded += 1
+            archive_path.unlink()
+            logger.info(f"タスクアーカイブを展開しました: {archive_path} ({expanded}件)")
+        except Exception as e:
+            logger.error(f"タスクアーカイブ展開エラー: {e}")
+    
+    def _scan_task_dir(self, subdir: str) -> List[str]:
+        """
+        タスクディレクトリ内のファイル名一覧を取得
+        
+        os.scandir()はディレクトリエントリをまとめて読み込み、エントリごとのstat()を行わない
+        
+        タスクアーカイブ（tasks.tar）はタスクファイルではないため一覧に含めない。
+        アーカイブの展開は起動時のみ行う（タスク生成ツールが書き込み中のアーカイブを
+        展開しないよう、起動後に置かれたアーカイブは次回起動時に展開する）。
+        
+        Args:
+            subdir: .tasks/以下のサブディレクトリ名（pending/working等）
+            
+        Returns:
+            ファイル名のリスト
+        """
+        with os.scandir(self.tasks_dir / subdir) as entries:
+            names = [entry.name for entry in entries]
+        if TASK_ARCHIVE_NAME in names:
+            names.remove(TASK_ARCHIVE_NAME)
+            if not self._archive_warned:
+                self._archive_warned = True
+                logger.warning(f"{subdir}/{TASK_ARCHIVE_NAME} は展開されていないため割り当てません（次回起動時に展開します）")
+        return names
+    
     def _signal_handler(self, signum, frame):
         """シグナルハンドラ - Ctrl-C等での終了処理"""
         logger.info("終了シグナルを受信しました")
@@ -103,15 +365,30 @@ class TaskMaster:
     
     def _add_message(self, message: dict):
         """スレッド間メッセージをキューに追加"""
-        with self.message_lock:
-            self.message_queue.append(message)
+        self.message_queue.append(message)
+        
+        # メインループのselect()の待ちを解除する
+        try:
+            self._wakeup_writer.send(b"\0")
+        except OSError:
+            pass  # 既に未処理の通知が溜まっている（BlockingIOError）、または終了処理済み
+    
+    def _drain_wakeup(self):
+        """メインループを起こすための通知を読み捨てる"""
+        try:
+            while self._wakeup_reader.recv(4096):
+                pass
+        except OSError:
+            pass  # 読み捨て完了（BlockingIOError）
     
     def _get_messages(self) -> List[dict]:
-        """キューからメッセージを取得してクリア"""
-        with self.message_lock:
-            messages = self.message_queue.copy()
-            self.message_queue.clear()
-            return messages
+        """
+        キューからメッセージを取得してクリア
+        
+        取り出し中に別スレッドから追加されたメッセージは取りこぼさず、キューに残して次回取り出す。
+        """
+        message_queue = self.message_queue
+        return [message_queue.popleft() for _ in range(len(message_queue))]
     
     def start(self):
         """タスク管理マスタを開始"""
@@ -122,32 +399,56 @@ class TaskMaster:
         self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         self.server_socket.bind(("0.0.0.0", self.port))
         self.server_socket.listen(10)
-        self.server_socket.settimeout(1.0)  # ノンブロッキング処理のため
+        self.server_socket.setblocking(False)
+        # サーバーソケットと通知用ソケットはdata=Noneで登録し、ワーカーのソケット（data=ワーカーオブジェクト）と区別する
+        self.selector.register(self.server_socket, selectors.EVENT_READ, data=None)
         
-        # タイマースレッド開始
-        self.timer_thread = threading.Thread(target=self._timer_thread, daemon=True)
-        self.timer_thread.start()
+        # ファイル入出力スレッド開始
+        self.fs_thread = threading.Thread(target=self._fs_worker, daemon=True)
+        self.fs_thread.start()
         
         logger.info("メインループを開始")
         self._main_loop()
     
-    def _timer_thread(self):
-        """タイマースレッド - 定期的にタイマーイベントを送信（デフォルト10秒）"""
-        timer_interval = 10  # デフォルト設定は10秒ごと
-        while self.running:
-            time.sleep(timer_interval)
-            if self.running:
-                self._add_message({"type": "TIMER", "msg": ""})
-    
     def _main_loop(self):
         """メインループ - イベント待ち受けと処理"""
         while self.running:
             try:
-                # 新しい接続の受け入れ
-                self._accept_new_connections()
+                # 新しい接続・ワーカーからの受信・送信可能のいずれかを待つ
+                # （最大1秒。直近のタイムアウト時刻・タイマー時刻がそれより前なら、その時刻まで）
+                # 準備ができたソケットだけがイベントとして返るため、待ちはselect()の1回のみ
+                for key, mask in self.selector.select(timeout=self._next_select_timeout()):
+                    if key.data is None:
+                        if key.fileobj is self.server_socket:
+                            # 新しい接続の受け入れ
+                            self._accept_new_connections()
+                        else:
+                            # スレッド間メッセージの到着通知（メッセージは後段でまとめて処理する）
+                            self._drain_wakeup()
+                        continue
+                    
+                    if isinstance(key.data, JoiningConnection):
+                        # 参入メッセージの受信
+                        self._drain_joining(key.data)
+                        continue
+                    
+                    # 送信しきれなかったデータの送信
+                    if mask & selectors.EVENT_WRITE:
+                        self._flush_worker(key.data)
+                    
+                    # 既存ワーカーからのメッセージ受信
+                    if mask & selectors.EVENT_READ:
+                        self._drain_worker(key.data)
                 
-                # 既存ワーカーからのメッセージ受信
-                self._receive_worker_messages()
+                # 期限切れのタイムアウト監視をタイムアウト確認メッセージとして送信
+                self._post_expired_timeouts()
+                
+                # タイマー時刻を過ぎていればタイマーイベントメッセージを送信
+                self._post_timer_event()
+                
+                # 参入メッセージの受信期限を過ぎた接続を切断
+                if self.joining:
+                    self._expire_joining()
                 
                 # スレッド間メッセージの処理
                 self._process_internal_messages()
@@ -162,45 +463,128 @@ class TaskMaster:
         self._shutdown()
     
     def _accept_new_connections(self):
-        """新しいタスクワーカーの接続を受け入れ"""
-        try:
-            client_socket, address = self.server_socket.accept()
+        """新しいタスクワーカーの接続を受け入れ（受け入れ待ちの接続がなくなるまで）"""
+        while True:
+            try:
+                client_socket, address = self.server_socket.accept()
+            except BlockingIOError:
+                return  # 受け入れ待ちの接続なし
+            except Exception as e:
+                if self.running:
+                    logger.error(f"接続受け入れエラー: {e}")
+                return
+            
             logger.info(f"新しい接続を受け入れ: {address}")
             
+            # ソケットオプションの設定（タスクワーカー側の設定と同じ）
+            # CHECK/REQUEST_ACK等の小さな制御メッセージが、Nagleアルゴリズムと
+            # 相手側の遅延ACKの組み合わせで数十ms待たされないようにする。
+            # 小さなパケットが増えるが、送信するのは散発的な制御メッセージのみのため影響はない
+            try:
+                client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)  # Nagleアルゴリズム無効化
+                client_socket.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)  # KeepAlive有効化
+            except OSError as e:
+                logger.warning(f"ソケットオプション設定エラー: {e}")
+            
             # JOINメッセージの待機
-            threading.Thread(
-                target=self._handle_new_worker,
-                args=(client_socket, address),
-                daemon=True
-            ).start()
+            # 参入メッセージの受信もメインループで行うため、ノンブロッキングにしてセレクタに登録する
+            # （受信期限は従来の受信タイムアウトと同じ5秒）
+            try:
+                client_socket.setblocking(False)
+                joining = JoiningConnection(
+                    socket=client_socket, address=address, deadline=time.time() + 5.0
+                )
+                self.selector.register(client_socket, selectors.EVENT_READ, data=joining)
+                self.joining[client_socket] = joining
+            except Exception as e:
+                logger.error(f"新しいワーカー処理エラー: {e}")
+                client_socket.close()
+    
+    def _drain_joining(self, joining: JoiningConnection):
+        """
+        参入待ちの接続からの参入メッセージ受信
+        
+        参入メッセージ（JOIN）のフレームを受信し終えたら、新しいワーカーの初期処理を行う。
+        受信途中であれば接続情報の受信バッファに保持し、次の受信を待つ。
+        
+        Args:
+            joining: 受信対象の参入待ちの接続
+        """
+        client_socket = joining.socket
+        try:
+            while True:
+                try:
+                    chunk = client_socket.recv(65536)
+                except BlockingIOError:
+                    break  # 受信済みのデータをすべて読み出した
+                if not chunk:
+                    raise ConnectionError("参入メッセージの受信途中で接続が切断されました")
+                joining.recv_buffer += chunk
             
-        except socket.timeout:
-            pass  # タイムアウトは正常な動作
+            buffer = joining.recv_buffer
+            if len(buffer) < MESSAGE_HEADER.size:
+                return  # ヘッダ受信待ち
+            (length,) = MESSAGE_HEADER.unpack_from(buffer)
+            if length > MAX_MESSAGE_SIZE:
+                raise ValueError(f"参入メッセージが大きすぎます ({length}バイト)")
+            end = MESSAGE_HEADER.size + length
+            if len(buffer) < end:
+                return  # 本体受信待ち
+            message = decode_message(buffer[MESSAGE_HEADER.size:end])
         except Exception as e:
-            if self.running:
-                logger.error(f"接続受け入れエラー: {e}")
+            logger.error(f"新しいワーカー処理エラー: {e}")
+            self._close_joining(joining)
+            return
+        
+        # 参入待ちの接続としての監視を終了
+        del self.joining[client_socket]
+        self.selector.unregister(client_socket)
+        self._handle_new_worker(joining, message, buffer[end:])
     
-    def _handle_new_worker(self, client_socket: socket.socket, address):
-        """新しいワーカーの初期処理"""
+    def _handle_new_worker(self, joining: JoiningConnection, message: dict, remaining: bytearray):
+        """
+        新しいワーカーの初期処理
+        
+        Args:
+            joining: 参入メッセージを受信した接続
+            message: 受信した参入メッセージ
+            remaining: 参入メッセージに続けて受信済みのデータ
+        """
+        client_socket = joining.socket
+        address = joining.address
         try:
-            client_socket.settimeout(5.0)
-            data = client_socket.recv(1024).decode('utf-8')
-            message = json.loads(data)
-            
             if message.get("type") == "JOIN":
                 worker_id = message.get("msg", f"worker_{address[0]}_{address[1]}")
                 
+                # ワーカーIDは送信元ポート番号のため、別のホストのワーカーと重複し得る
+                # 接続中のワーカーと同じIDの参入は受け付けない（既存のワーカーの登録を上書きすると、
+                # 既存のワーカーのソケットが読み出されないままセレクタに残ってしまう）
+                existing = self.workers.get(worker_id)
+                if existing and existing.status != "exiting":
+                    logger.warning(f"ワーカーID {worker_id} は接続中のワーカーと重複するため、参入を拒否します ({address})")
+                    client_socket.close()
+                    return
+                
                 # ワーカーオブジェクト作成
                 worker = WorkerObject(
                     socket=client_socket,
                     worker_id=worker_id,
-                    status="idle"
+                    status="idle",
+                    recv_buffer=remaining
                 )
+                
+                # 以降の送受信はワーカーとしてメインループで行うため、セレクタに登録し直す
+                # セレクタにはワーカーオブジェクトを登録し、イベントをIDではなく接続そのものに対応付ける
+                self.selector.register(client_socket, selectors.EVENT_READ, data=worker)
                 self.workers[worker_id] = worker
                 
                 # JOIN_ACK応答
-                response = {"type": "JOIN_ACK", "msg": ""}
-                client_socket.send((json.dumps(response) + '\n').encode('utf-8'))
+                try:
+                    self._send_to_worker(worker, _JOIN_ACK_FRAME)
+                except Exception as e:
+                    logger.error(f"ワーカー {worker_id} への送信エラー: {e}")
+                    self._handle_worker_disconnect(worker_id)
+                    return
                 
                 logger.info(f"ワーカー {worker_id} が参入しました")
             else:
@@ -211,34 +595,130 @@ class TaskMaster:
             logger.error(f"新しいワーカー処理エラー: {e}")
             client_socket.close()
     
-    def _receive_worker_messages(self):
-        """既存ワーカーからのメッセージ受信"""
-        disconnected_workers = []
+    def _expire_joining(self):
+        """参入メッセージの受信期限を過ぎた接続を切断"""
+        current_time = time.time()
+        for joining in [j for j in self.joining.values() if j.deadline <= current_time]:
+            logger.error(f"新しいワーカー処理エラー: 参入メッセージ受信タイムアウト ({joining.address})")
+            self._close_joining(joining)
+    
+    def _close_joining(self, joining: JoiningConnection):
+        """
+        参入待ちの接続を切断
         
-        for worker_id, worker in self.workers.items():
-            try:
-                worker.socket.settimeout(0.1)
-                data = worker.socket.recv(65536).decode('utf-8', errors='replace')  # バッファサイズを増やして確実に受信
-                if data:
-                    # 複数のJSONメッセージが連結されている可能性を考慮
-                    messages = self._parse_json_messages(data)
-                    for message in messages:
-                        if message:
-                            self._handle_worker_message(worker_id, message)
-                else:
+        Args:
+            joining: 切断する参入待ちの接続
+        """
+        self.joining.pop(joining.socket, None)
+        try:
+            self.selector.unregister(joining.socket)
+        except (KeyError, ValueError):
+            pass  # 未登録
+        joining.socket.close()
+    
+    def _drain_worker(self, worker: WorkerObject):
+        """
+        ワーカーからのメッセージ受信
+        
+        セレクタが読み込み可能と通知したソケットから、受信済みのデータがなくなるまで
+        recv()を繰り返して読み出し、まとめて解析する。
+        
+        Args:
+            worker: 受信対象のワーカー（セレクタに登録したワーカーオブジェクト）
+        """
+        if worker.status == "exiting":
+            return
+        worker_id = worker.worker_id
+        
+        chunks = []
+        disconnected = False
+        try:
+            while True:
+                try:
+                    chunk = worker.socket.recv(65536)
+                except BlockingIOError:
+                    break  # 受信済みのデータをすべて読み出した
+                if not chunk:
                     # 接続切断
-                    disconnected_workers.append(worker_id)
-                    
-            except socket.timeout:
-                pass  # タイムアウトは正常
+                    disconnected = True
+                    break
+                chunks.append(chunk)
+        except Exception as e:
+            logger.error(f"ワーカー {worker_id} からのメッセージ受信エラー: {e}")
+            disconnected = True
+        
+        if chunks:
+            # 前回の受信で残った受信途中のメッセージに続けて、フレーム単位で取り出す
+            worker.recv_buffer += b"".join(chunks)
+            try:
+                # 複数のメッセージがまとめて届いている可能性を考慮
+                for message in self._parse_frames(worker):
+                    if message:
+                        self._handle_worker_message(worker_id, message)
+                    # メッセージ処理中に切断処理が行われた場合は残りを処理しない
+                    if worker.status == "exiting":
+                        return
             except Exception as e:
-                logger.error(f"ワーカー {worker_id} からのメッセージ受信エラー: {e}")
-                logger.debug(f"受信データ: {repr(data) if 'data' in locals() else 'N/A'}")
-                disconnected_workers.append(worker_id)
+                logger.error(f"ワーカー {worker_id} からのメッセージ処理エラー: {e}")
+                disconnected = True
+        
+        if disconnected:
+            self._handle_worker_disconnect(worker_id)
+    
+    def _send_to_worker(self, worker: WorkerObject, data: bytes):
+        """
+        ワーカーにデータを送信
+        
+        ワーカーのソケットはノンブロッキングのため、送信しきれなかった分は
+        送信バッファに保持し、セレクタで書き込み可能になった時点で続きを送信する。
+        
+        Args:
+            worker: 送信先のワーカー
+            data: 送信するデータ
+        """
+        if worker.status == "exiting":
+            return  # 切断処理中のワーカーには送信しない
+        
+        if worker.send_buffer:
+            # 先に送信待ちのデータがある場合は順序を保つため後ろに追加する
+            worker.send_buffer += data
+            return
+        
+        try:
+            sent = worker.socket.send(data)
+        except BlockingIOError:
+            sent = 0
+        
+        if sent < len(data):
+            worker.send_buffer += data[sent:]
+            self.selector.modify(
+                worker.socket, selectors.EVENT_READ | selectors.EVENT_WRITE, data=worker
+            )
+    
+    def _flush_worker(self, worker: WorkerObject):
+        """
+        送信しきれなかったデータの送信
+        
+        Args:
+            worker: 送信対象のワーカー（セレクタに登録したワーカーオブジェクト）
+        """
+        if worker.status == "exiting":
+            return
+        worker_id = worker.worker_id
         
-        # 切断されたワーカーの処理
-        for worker_id in disconnected_workers:
+        try:
+            sent = worker.socket.send(worker.send_buffer)
+            del worker.send_buffer[:sent]
+        except BlockingIOError:
+            return
+        except Exception as e:
+            logger.error(f"ワーカー {worker_id} への送信エラー: {e}")
             self._handle_worker_disconnect(worker_id)
+            return
+        
+        if not worker.send_buffer:
+            # 送信待ちのデータがなくなったら、書き込み可能の監視をやめる
+            self.selector.modify(worker.socket, selectors.EVENT_READ, data=worker)
     
     def _handle_worker_message(self, worker_id: str, message: dict):
         """ワーカーからのメッセージを処理"""
@@ -254,8 +734,9 @@ class TaskMaster:
             if req_id:
                 # 稼働状態をworkingに変更、リクエスト情報を削除
                 worker.status = "working"
-                worker.request_infos = [r for r in worker.request_infos if r.request_id != req_id]
-                logger.info(f"ワーカー {worker_id} がタスク実行を開始 (req_id: {req_id})")
+                worker.request_infos.pop(req_id, None)
+                self.req_owner.pop(req_id, None)
+                logger.info("ワーカー %s がタスク実行を開始 (req_id: %s)", worker_id, req_id)
         
         elif msg_type in ["DONE", "FAILED"]:
             # タスク完了報告
@@ -269,8 +750,9 @@ class TaskMaster:
             # ヘルスチェック応答
             req_id = message.get("req_id")
             if req_id:
-                worker.request_infos = [r for r in worker.request_infos if r.request_id != req_id]
-                logger.debug(f"ワーカー {worker_id} ヘルスチェック正常 (req_id: {req_id})")
+                worker.request_infos.pop(req_id, None)
+                self.req_owner.pop(req_id, None)
+                logger.debug("ワーカー %s ヘルスチェック正常 (req_id: %s)", worker_id, req_id)
         
         elif msg_type == "LEAVE":
             # 離脱通知
@@ -283,25 +765,19 @@ class TaskMaster:
             return
         
         # .tasks/working/から適切なディレクトリに移動
-        working_file = self.tasks_dir / "working" / worker.current_task_file
+        working_file = self._working_prefix + worker.current_task_file
         
         if result_type == "DONE":
-            target_dir = self.tasks_dir / "done"
+            target_prefix = self._done_prefix
             self.success_tasks += 1
-            logger.info(f"タスク完了: {worker.current_task_file} (ワーカー: {worker_id})")
+            logger.info("タスク完了: %s (ワーカー: %s)", worker.current_task_file, worker_id)
         else:  # FAILED
-            target_dir = self.tasks_dir / "failed"
+            target_prefix = self._failed_prefix
             self.failed_tasks += 1
-            logger.info(f"タスク失敗: {worker.current_task_file} (ワーカー: {worker_id})")
+            logger.info("タスク失敗: %s (ワーカー: %s)", worker.current_task_file, worker_id)
         
-        # ファイル移動
-        try:
-            if working_file.exists():
-                target_path = target_dir / worker.current_task_file
-                working_file.rename(target_path)
-                logger.debug(f"ファイル移動完了: {worker.current_task_file} → {target_dir.name}")
-        except Exception as e:
-            logger.error(f"タスクファイル移動エラー: {e}")
+        # ファイル移動（ファイル入出力スレッドで実施）
+        self.fs_queue.put(("move", working_file, target_prefix + worker.current_task_file))
         
         # ワーカー状態をidleに戻し、タスクファイル情報をクリア
         worker.status = "idle"
@@ -325,15 +801,15 @@ class TaskMaster:
         
         # .tasks/working/から.tasks/pending/にファイルを移動
         if worker.current_task_file:
-            working_file = self.tasks_dir / "working" / worker.current_task_file
-            pending_file = self.tasks_dir / "pending" / worker.current_task_file
+            task_name = worker.current_task_file
+            working_file = self._working_prefix + task_name
             
             try:
-                if working_file.exists():
-                    working_file.rename(pending_file)
-                    logger.info(f"使用制限によりタスクをpendingに移動: {worker.current_task_file}")
-                else:
-                    logger.warning(f"移動対象ファイルが見つかりません: {working_file}")
+                os.replace(working_file, self._pending_prefix + task_name)
+                self.pending_names.add(task_name)
+                logger.info(f"使用制限によりタスクをpendingに移動: {task_name}")
+            except FileNotFoundError:
+                logger.warning(f"移動対象ファイルが見つかりません: {working_file}")
             except Exception as e:
                 logger.error(f"使用制限ファイル移動エラー: {e}")
         
@@ -356,21 +832,35 @@ class TaskMaster:
             
             elif msg_type == "DISCONNECT":
                 worker_id = message.get("msg")
-                if worker_id and worker_id in self.workers:
+                # 切断処理済みのワーカーのみ削除する（切断後に同じIDで参入し直したワーカーは残す）
+                worker = self.workers.get(worker_id) if worker_id else None
+                if worker and worker.status == "exiting":
                     del self.workers[worker_id]
                     logger.info(f"ワーカー {worker_id} を削除しました")
             
             elif msg_type == "TIMEOUT_CHECK":
                 req_id = message.get("msg")
                 self._handle_timeout_check(req_id)
+            
+            elif msg_type == "SEND_REQUEST":
+                self._send_task_request(message)
+            
+            elif msg_type == "ASSIGN_FAILED":
+                self._handle_assign_failed(message)
     
     def _handle_timer_event(self):
         """タイマーイベント処理"""
         # ファイル数チェック
-        pending_count = len(list((self.tasks_dir / "pending").glob("*")))
-        working_count = len(list((self.tasks_dir / "working").glob("*")))
+        # pendingは外部から追加されたファイルを取り込むため、走査結果で一覧を更新する
+        # （ファイル入出力スレッドでworkingへ移動中のファイルは除く）
+        self.pending_names = set(self._scan_task_dir("pending")) - self.assigning_names
+        pending_count = len(self.pending_names)
+        working_count = len(self._scan_task_dir("working"))
+        # workingへ移動中のファイルはpending・workingのどちらの一覧にも現れないため、別に数える
+        assigning_count = len(self.assigning_names)
         
-        if pending_count + working_count == 0:
+        # ファイル入出力スレッドに未処理の依頼（割り当て・移動）が残っている間は完了としない
+        if pending_count + working_count + assigning_count == 0 and self.fs_queue.empty():
             logger.info("全タスク完了を検出")
             self._add_message({"type": "COMPLETED", "msg": ""})
             return
@@ -380,43 +870,43 @@ class TaskMaster:
     
     def _perform_health_checks(self):
         """全ワーカーのヘルスチェック実行"""
-        for worker_id, worker in self.workers.items():
+        # 送信失敗時の切断処理等で辞書が変更されても影響しないよう、スナップショットを走査する
+        workers = tuple(self.workers.items())
+        
+        # 全ワーカー分のヘルスチェックメッセージを先にまとめて組み立てておき、
+        # 送信はログ出力等を挟まずに連続して行う
+        checks = []
+        for worker_id, worker in workers:
+            if worker.status == "exiting":
+                continue
+            req_id = f"check_{next(_req_counter):x}"
+            checks.append((worker_id, worker, req_id, encode_check_message(req_id)))
+        
+        timeout_time = time.time() + 3
+        for worker_id, worker, req_id, data in checks:
             try:
-                req_id = f"check_{random.randint(1000, 9999)}"
-                check_message = {
-                    "type": "CHECK",
-                    "msg": "",
-                    "req_id": req_id
-                }
-                
-                worker.socket.send((json.dumps(check_message) + '\n').encode('utf-8'))
-                
-                # リクエスト情報追加
-                request_info = RequestInfo(
-                    request_id=req_id,
-                    timeout_time=time.time() + 3
-                )
-                worker.request_infos.append(request_info)
-                
-                # タイムアウト監視スレッド起動
-                threading.Thread(
-                    target=self._timeout_monitor,
-                    args=(req_id, 3),
-                    daemon=True
-                ).start()
-                
+                self._send_to_worker(worker, data)
             except Exception as e:
                 logger.error(f"ワーカー {worker_id} ヘルスチェック送信失敗: {e}")
                 self._handle_worker_disconnect(worker_id)
+                continue
+            
+            # リクエスト情報追加
+            worker.request_infos[req_id] = RequestInfo(
+                request_id=req_id,
+                timeout_time=timeout_time
+            )
+            self.req_owner[req_id] = worker_id
+            
+            # タイムアウト監視を登録（リクエスト情報と同じ時刻で監視する）
+            self._schedule_timeout_check(req_id, timeout_time)
+        
+        logger.debug("ヘルスチェック送信: %d件", len(checks))
     
     def _process_pending_tasks(self):
         """保留中タスクの処理"""
-        pending_dir = self.tasks_dir / "pending"
-        working_dir = self.tasks_dir / "working"
-        
-        # 保留中タスクファイルを取得
-        pending_files = list(pending_dir.glob("*"))
-        if not pending_files:
+        # 保留中タスクがなければ何もしない（ディレクトリは走査せず、一覧を参照する）
+        if not self.pending_names:
             return
         
         # アイドル状態のワーカーを検索
@@ -425,185 +915,349 @@ class TaskMaster:
             return
         
         # タスクを割り当て
-        for i, task_file in enumerate(pending_files):
-            if i >= len(idle_workers):
+        # ファイルのworkingへの移動と読み込みはファイル入出力スレッドで行い、
+        # 完了したらSEND_REQUESTメッセージでメインループに戻ってきてREQUESTを送信する
+        for worker in idle_workers:
+            if not self.pending_names:
                 break
             
-            worker = idle_workers[i]
+            task_name = self.pending_names.pop()
+            self.assigning_names.add(task_name)
             
-            try:
-                # ファイルを working ディレクトリに移動
-                working_file = working_dir / task_file.name
-                task_file.rename(working_file)
-                
-                # プロンプトテキスト読み込み
-                prompt_text = working_file.read_text(encoding='utf-8')
-                
-                # リクエストID生成
-                req_id = f"task_{random.randint(1000, 9999)}"
-                
-                # REQUESTメッセージ送信
-                request_message = {
-                    "type": "REQUEST",
-                    "msg": prompt_text,
-                    "req_id": req_id
-                }
-                
-                # JSON送信時にエスケープ問題を回避
-                json_data = json.dumps(request_message, ensure_ascii=False) + '\n'
-                worker.socket.send(json_data.encode('utf-8'))
-                
-                # ワーカー状態更新
-                worker.status = "requesting"
-                worker.current_task_file = working_file.name
-                request_info = RequestInfo(
-                    request_id=req_id,
-                    timeout_time=time.time() + 3
-                )
-                worker.request_infos.append(request_info)
-                
-                # タイムアウト監視スレッド起動
-                threading.Thread(
-                    target=self._timeout_monitor,
-                    args=(req_id, 3),
-                    daemon=True
-                ).start()
+            # ワーカー状態更新（REQUEST送信までの間に別のタスクを割り当てないようにする）
+            worker.status = "requesting"
+            worker.current_task_file = task_name
+            self.fs_queue.put(("assign", task_name, worker.worker_id))
+    
+    def _fs_worker(self):
+        """
+        ファイル入出力スレッド
+        
+        タスクファイルの移動・読み込みを依頼された順に実施する。
+        ネットワークファイルシステム等でファイル操作に時間がかかっても、
+        メインループでのワーカーとの送受信が止まらないようにする。
+        
+        依頼の種類:
+        - ("assign", ファイル名, ワーカーID): pendingからworkingに移動してプロンプトを読み込み、
+          SEND_REQUEST（失敗時はASSIGN_FAILED）メッセージをメインループに送信する
+        - ("move", 移動元パス, 移動先パス): ファイルを移動する（移動元がなければ何もしない）
+        - None: スレッドを終了する
+        """
+        pending_prefix = self._pending_prefix
+        working_prefix = self._working_prefix
+        
+        while True:
+            job = self.fs_queue.get()
+            if job is None:
+                break
+            
+            if job[0] == "assign":
+                _, task_name, worker_id = job
+                task_file = pending_prefix + task_name
+                working_file = working_prefix + task_name
+                try:
+                    # ファイルを working ディレクトリに移動
+                    os.replace(task_file, working_file)
+                except FileNotFoundError as e:
+                    # 一覧の更新後に外部から削除されたファイルは割り当てない
+                    logger.warning(f"タスクファイルが見つかりません: {e.filename}")
+                    self._add_message({
+                        "type": "ASSIGN_FAILED", "msg": task_name, "worker_id": worker_id,
+                        "requeue": False
+                    })
+                    continue
+                except Exception as e:
+                    logger.error(f"タスク割り当てエラー: {e}")
+                    self._add_message({
+                        "type": "ASSIGN_FAILED", "msg": task_name, "worker_id": worker_id,
+                        "requeue": os.path.exists(task_file)
+                    })
+                    continue
                 
-                self.total_tasks += 1
-                logger.info(f"タスク割り当て: {task_file.name} → ワーカー {worker.worker_id}")
+                try:
+                    # プロンプトテキスト読み込み
+                    # strにデコードしてからJSONにエンコードし直さず、バイト列のままエスケープして送信する
+                    # （デコードはUTF-8として正しいかの確認のみ）
+                    with open(working_file, 'rb') as f:
+                        prompt_data = f.read()
+                    # テキストモードでの読み込み（ユニバーサル改行）と同様に、改行をLFに統一する
+                    # （Windowsで作成されたタスクファイルのCRLFをそのままAIエージェントに渡さない）
+                    if b"\r" in prompt_data:
+                        prompt_data = prompt_data.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+                    if not prompt_data.isascii():
+                        prompt_data.decode('utf-8')
+                    escaped_prompt = escape_json_string(prompt_data)
+                except Exception as e:
+                    logger.error(f"タスク割り当てエラー: {e}")
+                    # ファイルを pending に戻す
+                    requeue = False
+                    try:
+                        os.replace(working_file, task_file)
+                        requeue = True
+                    except Exception as move_error:
+                        logger.error(f"タスクファイル移動エラー: {move_error}")
+                    self._add_message({
+                        "type": "ASSIGN_FAILED", "msg": task_name, "worker_id": worker_id,
+                        "requeue": requeue
+                    })
+                    continue
                 
-            except Exception as e:
-                logger.error(f"タスク割り当てエラー: {e}")
-                # ファイルを pending に戻す
-                if working_file.exists():
-                    working_file.rename(task_file)
+                self._add_message({
+                    "type": "SEND_REQUEST", "msg": escaped_prompt, "worker_id": worker_id,
+                    "task_file": task_name
+                })
+            
+            elif job[0] == "move":
+                _, source, target = job
+                try:
+                    os.replace(source, target)
+                    logger.debug("ファイル移動完了: %s → %s", source, target)
+                except FileNotFoundError:
+                    pass  # 移動元がない（移動済み等）
+                except Exception as e:
+                    logger.error(f"タスクファイル移動エラー: {e}")
     
-    def _timeout_monitor(self, req_id: str, timeout_seconds: int):
-        """タイムアウト監視スレッド"""
-        time.sleep(timeout_seconds)
-        self._add_message({"type": "TIMEOUT_CHECK", "msg": req_id})
+    def _send_task_request(self, message: dict):
+        """
+        タスク実行依頼（REQUEST）の送信
+        
+        ファイル入出力スレッドでworkingへの移動とプロンプトの読み込みが完了した
+        タスク（SEND_REQUESTメッセージ）を、割り当て先のワーカーに送信する。
+        
+        Args:
+            message: SEND_REQUESTメッセージ（msg=エスケープ済みのプロンプトテキスト、worker_id、task_file）
+        """
+        worker_id = message.get("worker_id")
+        task_name = message.get("task_file")
+        self.assigning_names.discard(task_name)
+        
+        worker = self.workers.get(worker_id)
+        if not worker or worker.status != "requesting" or worker.current_task_file != task_name:
+            # ファイル移動中に割り当て先のワーカーが切断された場合は、pendingに戻す
+            self._return_task_to_pending(task_name)
+            return
+        
+        try:
+            # リクエストID生成
+            req_id = f"task_{next(_req_counter):x}"
+            
+            # REQUESTメッセージ送信
+            self._send_to_worker(worker, encode_request_message(req_id, message.get("msg", b"")))
+        except Exception as e:
+            logger.error(f"タスク割り当てエラー: {e}")
+            # ファイルを pending に戻し、送信できなかったワーカーは切断する
+            self._return_task_to_pending(task_name)
+            worker.current_task_file = ""
+            self._handle_worker_disconnect(worker_id)
+            return
+        
+        # リクエスト情報追加
+        request_info = RequestInfo(
+            request_id=req_id,
+            timeout_time=time.time() + 3
+        )
+        worker.request_infos[req_id] = request_info
+        self.req_owner[req_id] = worker_id
+        
+        # タイムアウト監視を登録（リクエスト情報と同じ時刻で監視する）
+        self._schedule_timeout_check(req_id, request_info.timeout_time)
+        
+        self.total_tasks += 1
+        logger.info("タスク割り当て: %s → ワーカー %s", task_name, worker_id)
+    
+    def _handle_assign_failed(self, message: dict):
+        """
+        タスク割り当て失敗（ASSIGN_FAILED）の処理
+        
+        Args:
+            message: ASSIGN_FAILEDメッセージ（msg=タスクファイル名、worker_id、requeue）
+        """
+        task_name = message.get("msg")
+        self.assigning_names.discard(task_name)
+        
+        # ファイルがpendingに残っていれば、再度割り当て対象にする
+        if message.get("requeue"):
+            self.pending_names.add(task_name)
+        
+        # ワーカーをidleに戻す
+        worker = self.workers.get(message.get("worker_id"))
+        if worker and worker.status == "requesting" and worker.current_task_file == task_name:
+            worker.status = "idle"
+            worker.current_task_file = ""
+    
+    def _return_task_to_pending(self, task_name: str):
+        """
+        .tasks/working/のタスクファイルを.tasks/pending/に戻す
+        
+        Args:
+            task_name: タスクファイル名
+        """
+        try:
+            os.replace(self._working_prefix + task_name, self._pending_prefix + task_name)
+            self.pending_names.add(task_name)
+            logger.info(f"タスクをpendingに戻しました: {task_name}")
+        except FileNotFoundError:
+            pass  # workingにない
+        except Exception as e:
+            logger.error(f"タスクファイル移動エラー: {e}")
+    
+    def _schedule_timeout_check(self, req_id: str, timeout_time: float):
+        """
+        タイムアウト監視を登録
+        
+        指定された時刻を過ぎると、メインループがタイムアウト確認メッセージ
+        （TIMEOUT_CHECK）を送信する。
+        タイムアウト確認ではリクエスト情報のtimeout_timeと比較するため、監視の時刻には
+        timeout_timeと同じ値を渡す（別に時刻を取得すると、監視の時刻の方が早くなった場合に
+        タイムアウトと判定されないまま監視が終わってしまう）。
+        
+        Args:
+            req_id: 監視対象のリクエストID
+            timeout_time: タイムアウト時刻（RequestInfo.timeout_timeと同じ値）
+        """
+        heapq.heappush(self.timeout_heap, (timeout_time, req_id))
+    
+    def _next_select_timeout(self) -> float:
+        """メインループの待ち時間を取得（最大1秒、直近のタイムアウト時刻・タイマー時刻まで）"""
+        next_time = self.next_timer_time
+        if self.timeout_heap:
+            next_time = min(next_time, self.timeout_heap[0][0])
+        return min(1.0, max(0.0, next_time - time.time()))
+    
+    def _post_timer_event(self):
+        """タイマー時刻を過ぎていれば、タイマーイベントメッセージ（TIMER）を送信"""
+        current_time = time.time()
+        if current_time < self.next_timer_time:
+            return
+        self.next_timer_time = current_time + self.timer_interval
+        self._add_message({"type": "TIMER", "msg": ""})
+    
+    def _post_expired_timeouts(self):
+        """期限切れのタイムアウト監視を取り出し、タイムアウト確認メッセージを送信"""
+        current_time = time.time()
+        while self.timeout_heap and self.timeout_heap[0][0] <= current_time:
+            _, req_id = heapq.heappop(self.timeout_heap)
+            self._add_message({"type": "TIMEOUT_CHECK", "msg": req_id})
     
     def _handle_timeout_check(self, req_id: str):
         """タイムアウト確認処理"""
         current_time = time.time()
         
-        for worker_id, worker in self.workers.items():
-            # 該当するリクエスト情報を検索
-            for request_info in worker.request_infos:
-                if request_info.request_id == req_id:
-                    # タイムアウト判定
-                    if current_time > request_info.timeout_time:
-                        logger.warning(f"ワーカー {worker_id} タイムアウト (req_id: {req_id})")
-                        # リクエスト情報削除
-                        worker.request_infos.remove(request_info)
-                        # ワーカー切断処理
-                        self._handle_worker_disconnect(worker_id)
-                    return
+        # リクエストIDから送信先のワーカーを取得（応答済みなら何もしない）
+        worker_id = self.req_owner.get(req_id)
+        if not worker_id:
+            return
+        worker = self.workers.get(worker_id)
+        request_info = worker.request_infos.get(req_id) if worker else None
+        if not request_info:
+            self.req_owner.pop(req_id, None)
+            return
+        
+        # タイムアウト判定
+        if current_time >= request_info.timeout_time:
+            logger.warning(f"ワーカー {worker_id} タイムアウト (req_id: {req_id})")
+            # リクエスト情報削除
+            del worker.request_infos[req_id]
+            self.req_owner.pop(req_id, None)
+            # ワーカー切断処理
+            self._handle_worker_disconnect(worker_id)
     
     def _handle_worker_disconnect(self, worker_id: str):
         """ワーカー切断処理"""
         worker = self.workers.get(worker_id)
-        if not worker:
-            return
+        if not worker or worker.status == "exiting":
+            return  # 切断処理済み
         
         # workingの場合、実施中のプロンプトファイルをpendingに移動
         if worker.status == "working" and worker.current_task_file:
-            working_file = self.tasks_dir / "working" / worker.current_task_file
-            pending_file = self.tasks_dir / "pending" / worker.current_task_file
-            
+            task_name = worker.current_task_file
             try:
-                if working_file.exists():
-                    working_file.rename(pending_file)
-                    logger.info(f"実施中タスクをpendingに移動: {worker.current_task_file}")
+                os.replace(self._working_prefix + task_name, self._pending_prefix + task_name)
+                self.pending_names.add(task_name)
+                logger.info(f"実施中タスクをpendingに移動: {task_name}")
+            except FileNotFoundError:
+                pass  # workingにない
             except Exception as e:
                 logger.error(f"タスクファイル移動エラー: {e}")
         
         worker.status = "exiting"
         
-        # ワーカー切断スレッド起動
-        threading.Thread(
-            target=self._disconnect_worker,
-            args=(worker_id,),
-            daemon=True
-        ).start()
+        # 応答待ちのリクエストは以後タイムアウト確認の対象外とする
+        for req_id in worker.request_infos:
+            self.req_owner.pop(req_id, None)
+        
+        # ソケットを閉じる前にセレクタの監視対象から外す
+        try:
+            self.selector.unregister(worker.socket)
+        except (KeyError, ValueError):
+            pass  # 未登録または切断処理済み
+        
+        # ワーカーとのTCP接続を切断し、メインループに切断メッセージを送信
+        self._close_worker_socket(worker)
+        self._add_message({"type": "DISCONNECT", "msg": worker_id})
+        logger.info(f"ワーカー {worker_id} 切断完了")
     
-    def _disconnect_worker(self, worker_id: str):
-        """ワーカー切断スレッド"""
-        worker = self.workers.get(worker_id)
-        if not worker:
-            return
+    def _close_worker_socket(self, worker: WorkerObject):
+        """
+        ワーカーとのTCP接続を切断
         
+        shutdown()で送受信を終了してからclose()する。SO_LINGERを設定していないため、
+        どちらも送信済みデータの到達を待たずに戻り、切断処理でブロックすることはない。
+        
+        Args:
+            worker: 切断するワーカー
+        """
+        try:
+            worker.socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass  # 相手側から既に切断されている
         try:
-            # 5秒のタイムアウトで切断
-            worker.socket.settimeout(5.0)
             worker.socket.close()
         except Exception as e:
-            logger.error(f"ワーカー {worker_id} 切断エラー: {e}")
-        finally:
-            # 切断完了通知
-            self._add_message({"type": "DISCONNECT", "msg": worker_id})
-            logger.info(f"ワーカー {worker_id} 切断完了")
-    
-    def _parse_json_messages(self, data: str) -> List[dict]:
-        """受信データから複数のJSONメッセージを解析"""
-        messages = []
+            logger.error(f"ワーカー {worker.worker_id} 切断エラー: {e}")
+    
+    def _parse_frames(self, worker: WorkerObject) -> List[dict]:
+        """
+        受信バッファから完全に受信済みのメッセージを取り出す
         
-        # 改行で区切って各行を個別に処理
-        lines = data.strip().split('\n')
+        各メッセージは「4バイトのJSON本体のバイト長＋JSON本体」のフレームで届くため、
+        ヘッダの長さ分だけ受信済みであれば1メッセージとして切り出す。
+        受信途中のフレームは受信バッファに残し、次回の受信データと合わせて処理する。
         
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-                
+        Args:
+            worker: 受信元のワーカー
+            
+        Returns:
+            解析したメッセージのリスト
+            
+        Raises:
+            ValueError: フレームヘッダの長さが上限を超えている場合（フレーム形式でないデータ）
+        """
+        buffer = worker.recv_buffer
+        messages = []
+        offset = 0
+        
+        while len(buffer) - offset >= MESSAGE_HEADER.size:
+            (length,) = MESSAGE_HEADER.unpack_from(buffer, offset)
+            if length > MAX_MESSAGE_SIZE:
+                raise ValueError(f"メッセージが大きすぎます ({length}バイト)")
+            end = offset + MESSAGE_HEADER.size + length
+            if len(buffer) < end:
+                break  # 受信途中
+            
+            body = buffer[offset + MESSAGE_HEADER.size:end]
+            offset = end
             try:
-                # JSONとして解析を試行
-                message = json.loads(line)
-                messages.append(message)
-            except json.JSONDecodeError as e:
+                messages.append(decode_message(body))
+            except ValueError as e:
+                # フレームの区切りは正しいため、このメッセージだけを読み飛ばす
                 logger.warning(f"JSON解析失敗: {e}")
-                logger.debug(f"問題のある行: {repr(line)}")
-                
-                # 複数のJSONが{}{}のように連結されている場合の処理
-                try:
-                    # 単純な分割処理を試行
-                    json_parts = self._split_concatenated_json(line)
-                    for part in json_parts:
-                        if part.strip():
-                            try:
-                                message = json.loads(part.strip())
-                                messages.append(message)
-                            except json.JSONDecodeError:
-                                logger.warning(f"分割後もJSON解析失敗: {repr(part)}")
-                except Exception as split_error:
-                    logger.error(f"JSON分割処理エラー: {split_error}")
+                # メッセージ全体のreprは大きくなり得るため、DEBUGレベルが有効な場合のみ作成する
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("問題のあるメッセージ: %r", bytes(body))
         
+        del buffer[:offset]
         return messages
-    
-    def _split_concatenated_json(self, data: str) -> List[str]:
-        """連結されたJSONを分割"""
-        json_objects = []
-        brace_count = 0
-        current_json = ""
-        
-        for char in data:
-            current_json += char
-            
-            if char == '{':
-                brace_count += 1
-            elif char == '}':
-                brace_count -= 1
-                
-                # 完全なJSONオブジェクトが完成
-                if brace_count == 0:
-                    json_objects.append(current_json)
-                    current_json = ""
-        
-        # 残りのデータがあれば追加
-        if current_json.strip():
-            json_objects.append(current_json)
-        
-        return json_objects
 
     def _shutdown(self):
         """タスク管理マスタ終了処理"""
@@ -616,29 +1270,27 @@ class TaskMaster:
         logger.info(f"成功タスク数: {self.success_tasks}")
         logger.info(f"失敗タスク数: {self.failed_tasks}")
         
-        # 全コネクション切断
-        disconnect_threads = []
-        for worker_id in list(self.workers.keys()):
-            thread = threading.Thread(
-                target=self._disconnect_worker,
-                args=(worker_id,),
-                daemon=True
-            )
-            thread.start()
-            disconnect_threads.append(thread)
-        
-        # 10秒のタイムアウトで切断完了を待機
-        start_time = time.time()
-        while disconnect_threads and (time.time() - start_time) < 10:
-            disconnect_threads = [t for t in disconnect_threads if t.is_alive()]
-            time.sleep(0.1)
+        # 全コネクション切断（切断処理はブロックしないため、スレッドを使わず順に切断する）
+        workers = list(self.workers.values())
+        self.workers.clear()
+        for worker in workers:
+            if worker.status != "exiting":
+                self._close_worker_socket(worker)
+                logger.info(f"ワーカー {worker.worker_id} 切断完了")
+        for joining in list(self.joining.values()):
+            self._close_joining(joining)
         
-        if disconnect_threads:
-            logger.warning("一部のワーカー切断がタイムアウトしました")
+        # ファイル入出力スレッドを終了（依頼済みのファイル移動は完了させる）
+        if self.fs_thread:
+            self.fs_queue.put(None)
+            self.fs_thread.join(timeout=10)
         
         # サーバーソケット切断
         if self.server_socket:
             self.server_socket.close()
+        self.selector.close()
+        self._wakeup_reader.close()
+        self._wakeup_writer.close()
         
         logger.info("タスク管理マスタを終了しました")
 
@@ -16,17 +16,24 @@ Claude Code SDKを使用したAIエージェントで処理を実行するワー
 
 import argparse
 import asyncio
+import atexit
 import json
 import logging
+import logging.handlers
 import os
+import queue
+import random
+import re
+import select
+import selectors
 import signal
 import socket
+import struct
 import sys
 import threading
 import time
 from pathlib import Path
-from typing import Optional, Dict, Any, List
-import traceback
+from typing import Optional, Dict, Any, Tuple
 
 # Claude Code SDKの導入（ドキュメント: 65行目）
 try:
@@ -35,13 +42,274 @@ try:
 except ImportError:
     CLAUDE_SDK_AVAILABLE = False
 
+# SDKがclaudeの出力をJSONとして解析できなかった場合の例外（SDKのバージョンによっては存在しない）
+try:
+    from claude_code_sdk import CLIJSONDecodeError
+except ImportError:
+    CLIJSONDecodeError = json.JSONDecodeError
+
+# orjsonの導入（任意。インストールされていればメッセージのJSON変換に使う）
+# 標準のjsonより高速で、dumps()がUTF-8のバイト列を直接返すためencode()も不要になる
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 # ログ設定
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+# ログの書き出し（標準エラー出力への書き込み）はリスナースレッドに任せ、ログを出すスレッドは
+# キューにレコードを入れるだけにする（AIエージェントの出力を大量にログに出す間も、
+# タスク実行スレッドやメインループが標準エラー出力への書き込みで待たされないようにする）
+# リスナースレッドはモジュールのインポート時ではなく、main()・TaskWorkerの初期化時に起動し、
+# ワーカー終了処理で停止する（インポートしただけでスレッドが残らないようにする）
+_log_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def _start_log_listener():
+    """
+    ログ出力用のリスナースレッドを起動し、ルートロガーにキュー経由のハンドラを設定
+    
+    basicConfig()と同じく、ルートロガーにハンドラが設定済みの場合（起動済みの場合を含む）は何もしない
+    """
+    global _log_listener
+    if _log_listener is not None or logging.getLogger().handlers:
+        return
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    # キューに入れる前の整形はメッセージ本体の展開のみとし、日時等の付加はリスナースレッド側で行う
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter('%(message)s'))
+    logging.basicConfig(level=logging.INFO, handlers=[queue_handler])
+    _log_listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    _log_listener.start()
+    # 終了処理を経ずにプロセスが終了する場合も、キューに残ったログを書き出してから止める
+    atexit.register(_stop_log_listener)
+
+
+def _stop_log_listener():
+    """
+    ログ出力用のリスナースレッドを停止
+    
+    停止後もログが失われないよう、ルートロガーのハンドラをキュー経由から直接書き出すものに戻してから、
+    キューに残ったログを書き出してリスナースレッドを止める（起動していない場合は何もしない）
+    """
+    global _log_listener
+    listener, _log_listener = _log_listener, None
+    if listener is None:
+        return
+    root = logging.getLogger()
+    for handler in listener.handlers:
+        root.addHandler(handler)
+    for handler in [h for h in root.handlers if isinstance(h, logging.handlers.QueueHandler)]:
+        root.removeHandler(handler)
+    listener.stop()
+
+
 logger = logging.getLogger(__name__)
 
+# TCP通信時のメッセージのフレームヘッダ（JSON本体のバイト長、4バイトのビッグエンディアン）
+# （tools/task_master.pyのMESSAGE_HEADERと同じ。docs/メッセージフォーマット.md参照）
+MESSAGE_HEADER = struct.Struct(">I")
+
+# 受信を許容するメッセージ本体の最大バイト長
+MAX_MESSAGE_SIZE = 64 * 1024 * 1024
+
+
+def encode_message(message: Dict[str, Any]) -> bytes:
+    """
+    メッセージをTCP送信用のフレームに変換
+    
+    Args:
+        message: 送信するメッセージ
+        
+    Returns:
+        フレームヘッダ（JSON本体のバイト長）とUTF-8エンコードしたJSON本体を連結したバイト列
+    """
+    if ORJSON_AVAILABLE:
+        body = orjson.dumps(message)
+    else:
+        body = json.dumps(message, ensure_ascii=False).encode('utf-8')
+    return MESSAGE_HEADER.pack(len(body)) + body
+
+
+def decode_message(body: bytes) -> Dict[str, Any]:
+    """
+    受信したフレームのJSON本体をメッセージに変換
+    
+    Args:
+        body: UTF-8エンコードされたJSON本体
+        
+    Returns:
+        メッセージ
+        
+    Raises:
+        ValueError: JSONとして解析できない場合
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def format_json_for_log(value: Any) -> str:
+    """
+    ログ出力用に値をインデント付きのJSON文字列に変換
+    
+    Args:
+        value: 変換する値
+        
+    Returns:
+        インデント（2スペース）付きのJSON文字列（日本語等はエスケープしない）
+    """
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(value, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode('utf-8')
+        except TypeError:
+            pass  # orjsonが扱えない値（大きすぎる整数等）は標準のjsonで変換する
+    return json.dumps(value, ensure_ascii=False, indent=2)
+
+
+# CHECK_ACK/REQUEST_ACKはreq_id以外が固定のため、JSON本体をテンプレートとして持つ
+_CHECK_ACK_BODY_TEMPLATE = b'{"type":"CHECK_ACK","msg":"","req_id":"%s"}'
+_REQUEST_ACK_BODY_TEMPLATE = b'{"type":"REQUEST_ACK","msg":"","req_id":"%s"}'
+# テンプレートにそのまま埋め込めるreq_id（JSONのエスケープが不要な英数字と「_」「-」のみ）
+_PLAIN_REQ_ID = re.compile(r'[0-9A-Za-z_-]+')
+
+# LEAVEは内容が固定のため、フレームまで変換しておく
+_LEAVE_FRAME = encode_message({"type": "LEAVE", "msg": ""})
+
+
+def _encode_ack_message(body_template: bytes, ack_type: str, req_id: Any) -> bytes:
+    """
+    応答（CHECK_ACK/REQUEST_ACK）メッセージをTCP送信用のフレームに変換
+    
+    応答のたびにdictの生成とJSON変換をしないよう、テンプレートにreq_idを埋め込む。
+    エスケープが必要な文字を含むreq_idの場合は、通常のメッセージと同様にJSON変換する。
+    
+    Args:
+        body_template: req_idを埋め込むJSON本体のテンプレート
+        ack_type: 応答メッセージのtype（テンプレートを使えない場合に用いる）
+        req_id: 受信したメッセージのリクエストID
+        
+    Returns:
+        フレームヘッダとJSON本体を連結したバイト列
+    """
+    if isinstance(req_id, str) and _PLAIN_REQ_ID.fullmatch(req_id):
+        body = body_template % req_id.encode('ascii')
+        return MESSAGE_HEADER.pack(len(body)) + body
+    return encode_message({"type": ack_type, "msg": "", "req_id": req_id})
+
+
+def encode_check_ack_message(req_id: Any) -> bytes:
+    """
+    ヘルスチェック応答（CHECK_ACK）メッセージをTCP送信用のフレームに変換
+    
+    Args:
+        req_id: 受信したヘルスチェックメッセージのリクエストID
+        
+    Returns:
+        フレームヘッダとJSON本体を連結したバイト列
+    """
+    return _encode_ack_message(_CHECK_ACK_BODY_TEMPLATE, "CHECK_ACK", req_id)
+
+
+def encode_request_ack_message(req_id: Any) -> bytes:
+    """
+    タスク実行依頼承諾（REQUEST_ACK）メッセージをTCP送信用のフレームに変換
+    
+    Args:
+        req_id: 受信したタスク実行依頼メッセージのリクエストID
+        
+    Returns:
+        フレームヘッダとJSON本体を連結したバイト列
+    """
+    return _encode_ack_message(_REQUEST_ACK_BODY_TEMPLATE, "REQUEST_ACK", req_id)
+
+
+# クエリ実行のリトライ時の待機時間（秒）：min(基準 × 2^リトライ回数, 上限) + 0〜揺らぎ幅の乱数
+RETRY_BACKOFF_BASE = 0.5
+RETRY_BACKOFF_MAX = 4.0
+RETRY_BACKOFF_JITTER = 0.25
+
+# リトライ可能とみなすクエリ実行中の例外（claudeとの通信途中でJSONの解析に失敗した場合）
+_RETRYABLE_QUERY_ERRORS = (json.JSONDecodeError, CLIJSONDecodeError)
+
+
+def is_retryable_query_error(error: BaseException) -> bool:
+    """
+    クエリ実行中の例外がリトライ可能かを判定
+    
+    例外メッセージの文字列ではなく、例外の型で判定する。
+    SDK内部のTaskGroupが例外をまとめた例外グループの場合は、含まれる例外を調べる。
+    
+    Args:
+        error: 発生した例外
+        
+    Returns:
+        bool: リトライ可能な場合True
+    """
+    if isinstance(error, _RETRYABLE_QUERY_ERRORS):
+        return True
+    # 例外グループ（ExceptionGroup。Python 3.11以降の組み込み）は、含まれる例外を再帰的に調べる
+    if isinstance(error, BaseExceptionGroup):
+        return any(is_retryable_query_error(inner) for inner in error.exceptions)
+    return False
+
+
+# usage limitの検出に用いる語句（小文字）
+_USAGE_LIMIT_PHRASES = ("usage limit", "rate limit")
+# 語句の共通部分「limit」の事前判定（大文字・小文字を区別しない）
+_LIMIT_PREFILTER = re.compile("limit", re.IGNORECASE).search
+
+
+def contains_usage_limit(text: str) -> bool:
+    """
+    テキストにusage limitを示す語句が含まれるかを判定
+    
+    AIエージェントの出力はほとんどがこれらの語句を含まないため、先に共通部分の「limit」の有無だけを
+    大文字・小文字を区別せずに調べ、含まれる場合にのみ小文字に変換して語句を探す。
+    これにより、長い出力テキストごとに小文字のコピーを作ることを避ける。
+    （「Usage LIMit」のような大文字・小文字の混在も、小文字に変換して判定した場合と同様に検出する）
+    
+    Args:
+        text: 判定するテキスト
+        
+    Returns:
+        bool: 語句が含まれる場合True
+    """
+    if not _LIMIT_PREFILTER(text):
+        return False
+    lowered = text.lower()
+    for phrase in _USAGE_LIMIT_PHRASES:
+        if phrase in lowered:
+            return True
+    return False
+
+
+# SDKのメッセージクラス名（小文字）から、辞書に変換した際のtypeへの対応
+_SDK_MESSAGE_TYPES = {
+    'systemmessage': 'system',
+    'assistantmessage': 'assistant',
+    'resultmessage': 'tool_result',
+}
+# SDKのメッセージオブジェクトから辞書に写す属性
+_SDK_MESSAGE_ATTRS = ('message', 'content', 'tool_use_id', 'error')
+
+
+def _get_sdk_message_shape(message: Any) -> Tuple[str, Tuple[str, ...]]:
+    """
+    SDKのメッセージオブジェクトを辞書に変換する際のtypeと、写す属性を調べる
+    
+    Args:
+        message: SDKのメッセージオブジェクト
+        
+    Returns:
+        (変換後のtype, 持っている属性名のタプル)
+    """
+    msg_type = type(message).__name__.lower()
+    msg_type = _SDK_MESSAGE_TYPES.get(msg_type, msg_type)
+    return msg_type, tuple(name for name in _SDK_MESSAGE_ATTRS if hasattr(message, name))
+
 
 class ClaudeManagerThread:
     """
@@ -51,6 +319,17 @@ class ClaudeManagerThread:
     長期間動作するアプリケーションを意識し、multi-turnで実行する
     """
     
+    # 属性を固定し、インスタンスごとの__dict__を持たないようにする
+    # （メッセージ処理ループで参照する属性の読み出しが辞書引きではなくスロット参照になる）
+    # 属性を追加する場合はここにも追加すること
+    __slots__ = (
+        "worker_id", "root_dir", "use_opus", "debug_auth", "skip_auth_check",
+        "running", "message_queue", "result_callback",
+        "_task_queue", "task_thread", "current_req_id", "_task_message_count",
+        "_runner", "_message_shapes", "model", "has_active_conversation",
+        "claude_options", "thread",
+    )
+    
     def __init__(self, worker_id: str, root_dir: str, use_opus: bool = False, debug_auth: bool = False, skip_auth_check: bool = False):
         """
         Claude管理スレッドを初期化
@@ -68,10 +347,26 @@ class ClaudeManagerThread:
         self.debug_auth = debug_auth
         self.skip_auth_check = skip_auth_check
         self.running = True
-        self.message_queue = []
-        self.message_lock = threading.Lock()
+        # メインループからのメッセージ（REQUEST/EXIT）のキュー
+        # get()でメッセージが届くまで待てるため、ポーリングのための待機が不要になる
+        self.message_queue: queue.SimpleQueue = queue.SimpleQueue()
         self.result_callback = None
         
+        # タスク実行スレッドへの依頼キュー（(プロンプトテキスト, リクエストID, タスクファイル名)、Noneで終了）
+        # タスクごとにスレッドを生成・破棄せず、1本のタスク実行スレッドを使い回す
+        # （タスク管理マスターは1ワーカーに同時に1タスクしか依頼しないため、スレッドは1本でよい）
+        # ThreadPoolExecutorのスレッドはデーモンスレッドにならず、終了時に実行中のタスクの完了を
+        # 待ってしまうため、デーモンスレッドを自前で持つ
+        self._task_queue: queue.SimpleQueue = queue.SimpleQueue()
+        self.task_thread: Optional[threading.Thread] = None
+        self.current_req_id: Optional[str] = None  # 実行中のタスクのリクエストID
+        # 実行中のタスクでAIエージェントから受け取ったメッセージ数（リトライを含む合計）
+        self._task_message_count = 0
+        # タスク実行スレッドで使い回すイベントループのランナー（タスクと/clearの実行ごとにループを作成・破棄しない）
+        self._runner: Optional[asyncio.Runner] = None
+        # SDKのメッセージクラスごとの、辞書に変換する際のtypeと写す属性（_get_sdk_message_shape()の結果）
+        self._message_shapes: Dict[type, Tuple[str, Tuple[str, ...]]] = {}
+        
         # モデル設定（ドキュメント: 79行目）
         self.model = "opus" if use_opus else "sonnet"
         
@@ -82,27 +377,33 @@ class ClaudeManagerThread:
         self.claude_options = None
         self._initialize_claude_sdk()
     
-    def _initialize_claude_sdk(self):
-        """Claude Code SDKを初期化（ドキュメント: 65行目）"""
+    @staticmethod
+    def check_environment():
+        """
+        Claude Code SDKを利用できる環境かを確認（ドキュメント: 67行目、75行目）
+        
+        タスクワーカーはタスク管理マスターへの接続前にも呼び出し、
+        利用できない場合は接続せずに終了する。
+        
+        Raises:
+            Exception: SDKが利用できない場合、またはAPIキーが設定されている場合
+        """
         if not CLAUDE_SDK_AVAILABLE:
             raise Exception("Claude Code SDKが利用できません。SDKをインストールしてください。")
         
-        # claudeログイン状態の確認（ドキュメント: 71行目）
-        if not self.skip_auth_check:
-            if self._check_claude_login():
-                logger.info("Claude認証状態確認完了")
-            else:
-                logger.warning("Claude認証状態の確認でエラーが発生しましたが、実行を継続します")
-                logger.warning("認証エラーが発生した場合は --skip-auth-check オプションを使用してください")
-        else:
-            logger.warning("認証チェックをスキップしました")
-        
         # APIキーの使用チェック（ドキュメント: 73行目）
         if os.environ.get('ANTHROPIC_API_KEY'):
             logger.warning("APIキーを用いないように警告を表示")
             raise Exception("APIキーを用いないように警告します。")
+    
+    def _initialize_claude_sdk(self):
+        """Claude Code SDKを初期化（ドキュメント: 65行目）"""
+        # SDKの有無・APIキーの使用チェック
+        # オプションの作成より前に判定し、APIキー利用時は何も作らずに終了する
+        self.check_environment()
         
         # Claude Code SDKオプション設定（ドキュメント: 77行目）
+        # ログイン状態の確認もこのオプションで行うため、確認用のオプションは別に作らない
         self.claude_options = ClaudeCodeOptions(
             model=self.model,
             cwd=str(self.root_dir),
@@ -110,6 +411,16 @@ class ClaudeManagerThread:
             continue_conversation=True  # 常にTrueで会話を継続（ドキュメント: 81行目）
         )
         
+        # claudeログイン状態の確認（ドキュメント: 71行目）
+        if not self.skip_auth_check:
+            if self._check_claude_login():
+                logger.info("Claude認証状態確認完了")
+            else:
+                logger.warning("Claude認証状態の確認でエラーが発生しましたが、実行を継続します")
+                logger.warning("認証エラーが発生した場合は --skip-auth-check オプションを使用してください")
+        else:
+            logger.warning("認証チェックをスキップしました")
+        
         logger.info(f"Claude Code SDK初期化完了 (モデル: {self.model}, ディレクトリ: {self.root_dir})")
     
     def _check_claude_login(self) -> bool:
@@ -117,40 +428,25 @@ class ClaudeManagerThread:
         claudeログイン状態を確認（ドキュメント: 71行目）
         
         Claude Code SDKの初期化が可能かどうかを確認する
-        実際のクエリ実行は行わず、初期化のみで判断する
+        実際のクエリ実行は行わず、_initialize_claude_sdk()で作成済みのオプションで判断する
+        （確認のためだけにオプションを作り直さない）
         
         Returns:
             bool: ログイン済みの場合True
         """
-        try:
-            if self.debug_auth:
-                logger.info("=== Claude認証デバッグ情報 ===")
-                logger.info("Claude Code SDKの初期化可能性をテスト中...")
-            
-            # Claude Code SDKオプションの作成をテスト
-            test_options = ClaudeCodeOptions(
-                model=self.model,
-                cwd=str(self.root_dir),
-                allowed_tools=[],  # ツールなしで最小限のテスト
-                max_turns=1
-            )
-            
-            if self.debug_auth:
-                logger.info("Claude Code SDKオプション作成成功")
-                logger.info("=== Claude認証デバッグ終了 ===")
-            
+        if self.debug_auth:
+            logger.info("=== Claude認証デバッグ情報 ===")
+            logger.info("Claude Code SDKの初期化可能性を確認中...")
+        
+        available = self.claude_options is not None
+        
+        if self.debug_auth:
+            logger.info("Claude Code SDKオプション: %s", "作成済み" if available else "未作成")
+            logger.info("=== Claude認証デバッグ終了 ===")
+        
+        if available:
             logger.info("Claude Code SDK初期化可能性確認完了")
-            return True
-            
-        except Exception as e:
-            if self.debug_auth:
-                logger.error(f"Claude認証確認エラー: {e}")
-                import traceback
-                logger.error(f"詳細エラー: {traceback.format_exc()}")
-                logger.info("=== Claude認証デバッグ終了 ===")
-            else:
-                logger.warning(f"Claude認証確認でエラーが発生: {e}")
-            return False
+        return available
     
     def set_result_callback(self, callback):
         """結果通知コールバックを設定"""
@@ -158,13 +454,14 @@ class ClaudeManagerThread:
     
     def add_message(self, message: Dict[str, Any]):
         """メッセージをキューに追加"""
-        with self.message_lock:
-            self.message_queue.append(message)
+        self.message_queue.put(message)
     
     def start(self):
         """スレッドを開始"""
         self.thread = threading.Thread(target=self._run, daemon=True)
         self.thread.start()
+        self.task_thread = threading.Thread(target=self._run_task_thread, daemon=True, name="task")
+        self.task_thread.start()
         logger.info("Claude管理スレッドを開始しました")
     
     def stop(self):
@@ -182,35 +479,49 @@ class ClaudeManagerThread:
         try:
             while self.running:
                 # メッセージ待ち受け（ドキュメント: 83-87行目）
+                # メッセージが届くまでブロックする（stop()はEXITメッセージを送るため、終了時も待ちが解除される）
                 message = self._get_next_message()
+                msg_type = message.get("type")
                 
-                if message:
-                    msg_type = message.get("type")
-                    
-                    if msg_type == "REQUEST":
-                        # タスク実行依頼（ドキュメント: 85行目）
-                        self._handle_task_request(message)
-                    
-                    elif msg_type == "EXIT":
-                        # 終了メッセージ（ドキュメント: 86行目）
-                        logger.info("Claude管理スレッド終了メッセージを受信")
-                        break
+                if msg_type == "REQUEST":
+                    # タスク実行依頼（ドキュメント: 85行目）
+                    self._handle_task_request(message)
                 
-                # 短い間隔でポーリング
-                time.sleep(0.1)
+                elif msg_type == "EXIT":
+                    # 終了メッセージ（ドキュメント: 86行目）
+                    logger.info("Claude管理スレッド終了メッセージを受信")
+                    break
                 
         except Exception as e:
-            logger.error(f"Claude管理スレッドエラー: {e}")
-            logger.error(traceback.format_exc())
+            logger.exception(f"Claude管理スレッドエラー: {e}")
         finally:
+            # タスク実行スレッドを終了（実行中のタスクの完了は待たない）
+            self._task_queue.put(None)
             logger.info("Claude管理スレッドを終了しました")
     
-    def _get_next_message(self) -> Optional[Dict[str, Any]]:
-        """次のメッセージを取得"""
-        with self.message_lock:
-            if self.message_queue:
-                return self.message_queue.pop(0)
-        return None
+    def _run_task_thread(self):
+        """
+        タスク実行スレッドのメイン処理
+        依頼されたタスクを順に実行する
+        """
+        # タスクと/clearのクエリはすべてこのスレッドで実行するため、イベントループを1つだけ作成して使い回す
+        # （asyncio.Runnerは終了時に非同期ジェネレータ・デフォルトのエグゼキュータの後始末をしてからループを閉じる）
+        with asyncio.Runner() as runner:
+            self._runner = runner
+            try:
+                while True:
+                    job = self._task_queue.get()
+                    if job is None:
+                        break
+                    self.current_req_id = job[1]
+                    self._execute_task_async(*job)
+                    self.current_req_id = None
+            finally:
+                self._runner = None
+    
+    def _get_next_message(self) -> Dict[str, Any]:
+        """次のメッセージを取得（届くまで待つ）"""
+        return self.message_queue.get()
     
     def _handle_task_request(self, message: Dict[str, Any]):
         """
@@ -223,18 +534,11 @@ class ClaudeManagerThread:
         prompt_text = message.get("msg", "")
         task_filename = message.get("task_filename", f"task_{req_id}")
         
-        logger.info(f"[CLAUDE-THREAD] タスク実行依頼を受信 (req_id: {req_id}, task: {task_filename})")
+        logger.info("[CLAUDE-THREAD] タスク実行依頼を受信 (req_id: %s, task: %s)", req_id, task_filename)
         
         # タスク実行を別スレッドで非同期実行（ドキュメント26行目：長時間ブロッキング防止）
-        import threading
-        task_thread = threading.Thread(
-            target=self._execute_task_async,
-            args=(prompt_text, req_id, task_filename),
-            daemon=True,
-            name=f"task-{req_id}"
-        )
-        task_thread.start()
-        logger.info(f"[CLAUDE-THREAD] タスク実行スレッドを起動 (req_id: {req_id}, スレッド: {task_thread.name})")
+        self._task_queue.put((prompt_text, req_id, task_filename))
+        logger.info("[CLAUDE-THREAD] タスク実行スレッドに依頼 (req_id: %s)", req_id)
         logger.debug("[CLAUDE-THREAD] Claude管理スレッドのメッセージループは継続中")
     
     def _execute_task_async(self, prompt_text: str, req_id: str, task_filename: str):
@@ -247,27 +551,30 @@ class ClaudeManagerThread:
             task_filename: タスクファイル名
         """
         try:
-            logger.info(f"[TASK-ASYNC] タスク実行開始 (req_id: {req_id})")
+            logger.info("[TASK-ASYNC] タスク実行開始 (req_id: %s)", req_id)
             
             # AIエージェントにプロンプトを与える（ドキュメント: 93行目）
             # JSONデコードエラーの場合はリトライ
             max_retries = 3
             retry_count = 0
             result_type = "FAILED"
+            self._task_message_count = 0
             
             while retry_count < max_retries:
                 try:
                     result_type = self._execute_task(prompt_text, req_id)
                     break  # 成功したらループを抜ける
                 except Exception as e:
-                    if "JSONDecodeError" in str(e) and retry_count < max_retries - 1:
+                    if is_retryable_query_error(e) and retry_count < max_retries - 1:
                         retry_count += 1
-                        logger.warning(f"[TASK-ASYNC-RETRY-{req_id}] JSONデコードエラーのためリトライ ({retry_count}/{max_retries})")
-                        time.sleep(2 * retry_count)  # バックオフ待機
+                        # バックオフ待機（指数的に延ばし、上限を設ける。複数ワーカーのリトライが揃わないよう揺らぎを加える）
+                        delay = min(RETRY_BACKOFF_BASE * (2 ** retry_count), RETRY_BACKOFF_MAX) + random.random() * RETRY_BACKOFF_JITTER
+                        logger.warning("[TASK-ASYNC-RETRY-%s] JSONデコードエラーのため%.1f秒後にリトライ (%s/%s)", req_id, delay, retry_count, max_retries)
+                        time.sleep(delay)
                     else:
                         raise  # リトライ不可なエラーまたはリトライ回数上限
             
-            logger.info(f"[TASK-ASYNC] タスク実行完了 (req_id: {req_id}, 結果: {result_type}, リトライ: {retry_count})")
+            logger.info("[TASK-ASYNC] タスク実行完了 (req_id: %s, 結果: %s, リトライ: %s)", req_id, result_type, retry_count)
             
             # タスク実行完了通知（ドキュメント: 107-111行目）
             if self.result_callback:
@@ -278,11 +585,10 @@ class ClaudeManagerThread:
                 })
             
             # コンテキストを消去（ドキュメント: 113行目）
-            self._clear_context()
+            self._clear_context_after_task(req_id)
             
         except Exception as e:
-            logger.error(f"[TASK-ASYNC] タスク実行エラー (req_id: {req_id}): {e}")
-            logger.error(traceback.format_exc())
+            logger.exception("[TASK-ASYNC] タスク実行エラー (req_id: %s): %s", req_id, e)
             
             # タスク失敗通知
             if self.result_callback:
@@ -291,6 +597,25 @@ class ClaudeManagerThread:
                     "msg": task_filename,
                     "req_id": req_id
                 })
+            
+            # リトライ回数の上限に達した場合等も、AIエージェントの出力があれば会話にコンテキストが
+            # 積まれているため、成功時と同様にコンテキストを消去する（ドキュメント: 113行目）
+            self._clear_context_after_task(req_id)
+    
+    def _clear_context_after_task(self, req_id: str):
+        """
+        タスク実行後のコンテキスト消去（ドキュメント: 113行目）
+        
+        AIエージェントからメッセージを1つも受け取らなかった場合（リトライを含む合計）は、
+        claudeが応答する前に失敗しており会話にコンテキストが積まれていないため、/clearの往復を省略する
+        
+        Args:
+            req_id: リクエストID
+        """
+        if self._task_message_count > 0:
+            self._clear_context()
+        else:
+            logger.info("[TASK-ASYNC] AIエージェントの出力がないため、コンテキストクリアを省略 (req_id: %s)", req_id)
     
     def _execute_task(self, prompt_text: str, req_id: str) -> str:
         """
@@ -304,16 +629,17 @@ class ClaudeManagerThread:
             str: 結果タイプ（DONE, FAILED, USAGE_LIMITED）
         """
         try:
-            # スレッド内で新しいイベントループを作成して実行
-            # asyncio.run()は新しいイベントループを作成するため、
-            # 既存のイベントループの有無を気にする必要はない
-            logger.debug(f"新しいイベントループでClaudeクエリを実行 (req_id: {req_id})")
-            result = asyncio.run(self._execute_claude_query(prompt_text, req_id))
+            # タスク実行スレッドのイベントループで実行
+            # asyncio.run()のようにタスクごとにイベントループを作成・破棄しない
+            logger.debug("タスク実行スレッドのイベントループでClaudeクエリを実行 (req_id: %s)", req_id)
+            result = self._runner.run(self._execute_claude_query(prompt_text, req_id))
             return result
             
         except Exception as e:
-            logger.error(f"タスク実行エラー: {e}")
-            logger.error(traceback.format_exc())
+            # リトライ可能なエラーは_execute_task_async()のリトライ処理に任せる
+            if is_retryable_query_error(e):
+                raise
+            logger.exception("タスク実行エラー: %s", e)
             return "FAILED"
     
     async def _execute_claude_query(self, prompt_text: str, req_id: str) -> str:
@@ -328,9 +654,9 @@ class ClaudeManagerThread:
             str: 結果タイプ（DONE, FAILED, USAGE_LIMITED）
         """
         try:
-            logger.info(f"Claude Code SDK実行開始 (req_id: {req_id})")
-            logger.debug(f"[CLAUDE-PROMPT-{req_id}] \u30d7\u30ed\u30f3\u30d7\u30c8\u5185\u5bb9:\n{prompt_text}")
-            logger.debug(f"[CLAUDE-OPTIONS-{req_id}] continue_conversation={self.claude_options.continue_conversation}")
+            logger.info("Claude Code SDK実行開始 (req_id: %s)", req_id)
+            logger.debug("[CLAUDE-PROMPT-%s] プロンプト内容:\n%s", req_id, prompt_text)
+            logger.debug("[CLAUDE-OPTIONS-%s] continue_conversation=%s", req_id, self.claude_options.continue_conversation)
             
             # continue_conversationオプションの設定（ドキュメント：81行目）
             # 2回目以降のプロンプトではcontinueオプションを指定
@@ -338,46 +664,52 @@ class ClaudeManagerThread:
             # オーバーヘッドを削減するため（ドキュメント: 81行目）
             if self.has_active_conversation:
                 # 既存の会話を継続
-                logger.info(f"[会話継続] continue_conversation=True (req_id: {req_id})")
+                logger.info("[会話継続] continue_conversation=True (req_id: %s)", req_id)
             else:
                 # 初回実行時
-                logger.info(f"[初回実行] continue_conversation=Trueを設定 (req_id: {req_id})")
-                logger.debug(f"[CLAUDE-FIRST-RUN-{req_id}] Claudeの初回起動です。システムプロンプトが読み込まれます。")
+                logger.info("[初回実行] continue_conversation=Trueを設定 (req_id: %s)", req_id)
+                logger.debug("[CLAUDE-FIRST-RUN-%s] Claudeの初回起動です。システムプロンプトが読み込まれます。", req_id)
                 self.has_active_conversation = True
             
-            # 常にcontinue_conversation=Trueを設定
-            self.claude_options.continue_conversation = True
+            # continue_conversationは_initialize_claude_sdk()でTrueに設定済みで、以降変更しない
             
             # Claude Code SDKでクエリ実行
             message_count = 0
             usage_limited = False
             
+            stream = query(prompt=prompt_text, options=self.claude_options)
             try:
-                async for message in query(prompt=prompt_text, options=self.claude_options):
+                async for message in stream:
                     message_count += 1
                     
                     # メッセージ処理（ドキュメント: 95行目）
-                    self._process_claude_message(message, req_id)
+                    # SDKのメッセージオブジェクトの辞書への変換は1回だけ行い、usage limit検出でも変換後の辞書を使う
+                    message = self._process_claude_message(message, req_id)
                     
                     # usage limit検出
                     if self._check_usage_limit(message):
                         usage_limited = True
-                        logger.warning(f"使用制限検出 (req_id: {req_id})")
+                        logger.warning("使用制限検出 (req_id: %s)", req_id)
                         break
                     
                     # 進捗ログ（5メッセージごと）
                     if message_count % 5 == 0:
-                        logger.debug(f"[CLAUDE-PROGRESS-{req_id}] 処理中... (メッセージ数: {message_count})")
+                        logger.debug("[CLAUDE-PROGRESS-%s] 処理中... (メッセージ数: %s)", req_id, message_count)
             except Exception as query_error:
                 # query実行中のエラーをキャッチ
-                logger.error(f"[CLAUDE-QUERY-ERROR-{req_id}] query実行中にエラー: {query_error}")
+                logger.error("[CLAUDE-QUERY-ERROR-%s] query実行中にエラー: %s", req_id, query_error)
                 # メッセージがある程度処理されていれば、部分的に成功とみなす
                 if message_count > 0:
-                    logger.warning(f"[CLAUDE-PARTIAL-{req_id}] {message_count}個のメッセージを処理後にエラー発生")
+                    logger.warning("[CLAUDE-PARTIAL-%s] %s個のメッセージを処理後にエラー発生", req_id, message_count)
                 raise  # エラーを再度raiseして外側のexceptで処理
+            finally:
+                self._task_message_count += message_count
+                # usage limit検出等で途中でループを抜けた場合も、ここでSDKの非同期ジェネレータを閉じる
+                # （イベントループを使い回すため、asyncio.run()の終了時の後始末に頼らない）
+                await stream.aclose()
             
-            logger.info(f"Claude Code SDK実行完了 (req_id: {req_id}, messages: {message_count})")
-            logger.debug(f"[CLAUDE-COMPLETE-{req_id}] 総メッセージ数: {message_count}, usage_limited: {usage_limited}")
+            logger.info("Claude Code SDK実行完了 (req_id: %s, messages: %s)", req_id, message_count)
+            logger.debug("[CLAUDE-COMPLETE-%s] 総メッセージ数: %s, usage_limited: %s", req_id, message_count, usage_limited)
             
             # 会話は常にアクティブのまま維持（ドキュメント: 81, 113行目）
 
@@ -389,19 +721,19 @@ class ClaudeManagerThread:
                 
         except Exception as e:
             error_type = type(e).__name__
-            logger.error(f"Claude Code SDK実行エラー (req_id: {req_id}, type: {error_type}): {e}")
-            logger.debug(f"[CLAUDE-EXEC-ERROR-{req_id}] {traceback.format_exc()}")
+            logger.error("Claude Code SDK実行エラー (req_id: %s, type: %s): %s", req_id, error_type, e)
+            logger.debug("[CLAUDE-EXEC-ERROR-%s] 詳細", req_id, exc_info=True)
             
             # JSONデコードエラーの場合は、リトライ可能なエラーとして扱う
-            if "JSONDecodeError" in str(e) or "unhandled errors in a TaskGroup" in str(e):
-                logger.warning(f"[CLAUDE-RETRY-{req_id}] JSONデコードエラーが発生しました。Claude SDKの通信エラーの可能性があります。")
+            if is_retryable_query_error(e):
+                logger.warning("[CLAUDE-RETRY-%s] JSONデコードエラーが発生しました。Claude SDKの通信エラーの可能性があります。", req_id)
                 # エラーを再度raiseして、上位でリトライ処理
                 raise
             
             # その他のエラー
             return "FAILED"
     
-    def _process_claude_message(self, message: Dict[str, Any], req_id: str):
+    def _process_claude_message(self, message: Dict[str, Any], req_id: str) -> Dict[str, Any]:
         """
         Claudeからの出力を処理（ドキュメント: 95行目）
         JSONオブジェクト内のcontentの中だけを出力
@@ -409,45 +741,50 @@ class ClaudeManagerThread:
         Args:
             message: Claudeからのメッセージ
             req_id: リクエストID
+            
+        Returns:
+            辞書に変換したメッセージ（変換できなかった場合は受け取ったメッセージ）
         """
         try:
-            # Claudeからの生メッセージをデバッグログに出力
+            # Claudeからの生メッセージをデバッグログに出力（JSON変換の負荷が大きいため、DEBUGログ出力時のみ）
             # Claude SDKのメッセージオブジェクトは直接JSON化できないため、
             # 文字列表現または属性をチェックして出力
-            try:
-                # メッセージが辞書の場合はそのままJSON化
-                if isinstance(message, dict):
-                    logger.debug(f"[CLAUDE-RAW-{req_id}] {json.dumps(message, ensure_ascii=False, indent=2)}")
-                else:
-                    # オブジェクトの場合は属性を辞書に変換して出力
-                    message_dict = {}
-                    if hasattr(message, '__dict__'):
-                        message_dict = message.__dict__.copy()
+            if logger.isEnabledFor(logging.DEBUG):
+                try:
+                    # メッセージが辞書の場合はそのままJSON化
+                    if isinstance(message, dict):
+                        logger.debug("[CLAUDE-RAW-%s] %s", req_id, format_json_for_log(message))
                     else:
-                        # オブジェクトの型と文字列表現を出力
-                        message_dict = {
-                            'type': type(message).__name__,
-                            'str': str(message)
-                        }
-                    logger.debug(f"[CLAUDE-RAW-{req_id}] {message_dict}")
-            except Exception as e:
-                logger.debug(f"[CLAUDE-RAW-{req_id}] メッセージデバッグ出力エラー: {e}, メッセージ型: {type(message)}")
+                        # オブジェクトの場合は属性を辞書に変換して出力
+                        message_dict = {}
+                        if hasattr(message, '__dict__'):
+                            message_dict = message.__dict__.copy()
+                        else:
+                            # オブジェクトの型と文字列表現を出力
+                            message_dict = {
+                                'type': type(message).__name__,
+                                'str': str(message)
+                            }
+                        logger.debug("[CLAUDE-RAW-%s] %s", req_id, message_dict)
+                except Exception as e:
+                    logger.debug("[CLAUDE-RAW-%s] メッセージデバッグ出力エラー: %s, メッセージ型: %s", req_id, e, type(message))
             
             # Claude SDKのメッセージオブジェクトを辞書に変換
             if not isinstance(message, dict):
                 # SystemMessage, AssistantMessage, ResultMessageなどのオブジェクトを辞書に変換
-                msg_type = type(message).__name__.lower()
-                if msg_type == 'systemmessage':
-                    msg_type = 'system'
+                # 変換後のtypeと写す属性はクラスごとに1回だけ調べ、以降はキャッシュを使う
+                # （メッセージごとにクラス名の文字列処理とhasattr()の確認を繰り返さない）
+                shape = self._message_shapes.get(type(message))
+                if shape is None:
+                    shape = self._message_shapes[type(message)] = _get_sdk_message_shape(message)
+                msg_type, attr_names = shape
+                
+                if msg_type == 'system' and logger.isEnabledFor(logging.DEBUG):
                     # システムメッセージ（システムプロンプト）をデバッグログに出力
                     if hasattr(message, 'content'):
-                        logger.debug(f"[CLAUDE-SYSTEM-PROMPT-{req_id}] \u30b7\u30b9\u30c6\u30e0\u30d7\u30ed\u30f3\u30d7\u30c8: {message.content}")
+                        logger.debug("[CLAUDE-SYSTEM-PROMPT-%s] システムプロンプト: %s", req_id, message.content)
                     elif hasattr(message, 'message') and hasattr(message.message, 'content'):
-                        logger.debug(f"[CLAUDE-SYSTEM-PROMPT-{req_id}] \u30b7\u30b9\u30c6\u30e0\u30d7\u30ed\u30f3\u30d7\u30c8: {message.message.content}")
-                elif msg_type == 'assistantmessage':
-                    msg_type = 'assistant'
-                elif msg_type == 'resultmessage':
-                    msg_type = 'tool_result'
+                        logger.debug("[CLAUDE-SYSTEM-PROMPT-%s] システムプロンプト: %s", req_id, message.message.content)
                 
                 # メッセージを辞書形式に変換
                 message_dict = {
@@ -455,51 +792,58 @@ class ClaudeManagerThread:
                 }
                 
                 # メッセージの属性を取得
-                if hasattr(message, 'message'):
-                    message_dict['message'] = message.message
-                if hasattr(message, 'content'):
-                    message_dict['content'] = message.content
-                if hasattr(message, 'tool_use_id'):
-                    message_dict['tool_use_id'] = message.tool_use_id
-                if hasattr(message, 'error'):
-                    message_dict['error'] = message.error
+                for attr_name in attr_names:
+                    message_dict[attr_name] = getattr(message, attr_name)
                 
                 message = message_dict
             
             if isinstance(message, dict):
                 msg_type = message.get("type", "")
                 
+                # 以降で出力するのはINFO/DEBUGレベルのログのみ（エラーメッセージを除く）のため、
+                # どちらも出力しない設定であれば、contentの走査をせずに終了する
+                if msg_type != "error" and not logger.isEnabledFor(logging.INFO):
+                    return message
+                
                 # assistantメッセージの処理
                 if msg_type == "assistant":
-                    msg_data = message.get("message", {})
-                    content_list = msg_data.get("content", [])
+                    # 通常はcontentの要素は1つのため、要素ごとの判定はtype()の比較と1回のget()で済ませる
+                    # （isinstance()より速く、strip()のように文字列を新たに生成しない）
+                    msg_data = message.get("message")
+                    content_list = msg_data.get("content") if type(msg_data) is dict else None
+                    if type(content_list) is not list:
+                        content_list = ()
                     
                     for content_item in content_list:
-                        if isinstance(content_item, dict):
-                            item_type = content_item.get("type", "")
+                        if type(content_item) is dict:
+                            item_type = content_item.get("type")
                             
                             # テキストコンテンツの出力（ドキュメント: 95行目）
                             if item_type == "text":
                                 text = content_item.get("text", "")
-                                if text.strip():
-                                    logger.info(f"[CLAUDE-{req_id}] {text}")
+                                if text and not text.isspace():
+                                    logger.info("[CLAUDE-%s] %s", req_id, text)
                                     # デバッグ用に詳細も出力
-                                    logger.debug(f"[CLAUDE-TEXT-{req_id}] \u6587字数: {len(text)}, \u5185\u5bb9: {repr(text[:200])}..." if len(text) > 200 else f"[CLAUDE-TEXT-{req_id}] \u6587\u5b57\u6570: {len(text)}, \u5185\u5bb9: {repr(text)}")
+                                    if len(text) > 200:
+                                        logger.debug("[CLAUDE-TEXT-%s] 文字数: %d, 内容: %r...", req_id, len(text), text[:200])
+                                    else:
+                                        logger.debug("[CLAUDE-TEXT-%s] 文字数: %d, 内容: %r", req_id, len(text), text)
                             
                             # ツール使用の表示
                             elif item_type == "tool_use":
                                 tool_name = content_item.get("name", "unknown")
                                 tool_id = content_item.get("id", "unknown")
                                 tool_input = content_item.get("input", {})
-                                logger.info(f"[CLAUDE-TOOL-{req_id}] {tool_name} (id: {tool_id})")
+                                logger.info("[CLAUDE-TOOL-%s] %s (id: %s)", req_id, tool_name, tool_id)
                                 # ツール入力をデバッグログに出力
-                                logger.debug(f"[CLAUDE-TOOL-INPUT-{req_id}] {tool_name}: {json.dumps(tool_input, ensure_ascii=False, indent=2)}")
+                                if logger.isEnabledFor(logging.DEBUG):
+                                    logger.debug("[CLAUDE-TOOL-INPUT-%s] %s: %s", req_id, tool_name, format_json_for_log(tool_input))
                 
                 # ツール結果の表示
                 elif msg_type == "tool_result":
                     tool_id = message.get("tool_use_id", "unknown")
                     tool_result = message.get("content", [])
-                    logger.debug(f"[CLAUDE-TOOL-RESULT-{req_id}] Tool ID: {tool_id}")
+                    logger.debug("[CLAUDE-TOOL-RESULT-%s] Tool ID: %s", req_id, tool_id)
                     # ツール結果の詳細をデバッグログに出力
                     if isinstance(tool_result, list):
                         for result_item in tool_result:
@@ -508,35 +852,38 @@ class ClaudeManagerThread:
                                 if result_type == "text":
                                     result_text = result_item.get("text", "")
                                     if len(result_text) > 500:
-                                        logger.debug(f"[CLAUDE-TOOL-RESULT-TEXT-{req_id}] {result_text[:500]}...")
+                                        logger.debug("[CLAUDE-TOOL-RESULT-TEXT-%s] %s...", req_id, result_text[:500])
                                     else:
-                                        logger.debug(f"[CLAUDE-TOOL-RESULT-TEXT-{req_id}] {result_text}")
+                                        logger.debug("[CLAUDE-TOOL-RESULT-TEXT-%s] %s", req_id, result_text)
                 
                 # システムメッセージの表示
                 elif msg_type == "system":
                     # システムプロンプトの内容をデバッグログに出力
                     content = message.get("content", "")
                     if isinstance(content, str):
-                        logger.debug(f"[CLAUDE-SYSTEM-PROMPT-{req_id}] {content}")
+                        logger.debug("[CLAUDE-SYSTEM-PROMPT-%s] %s", req_id, content)
                     elif isinstance(content, list):
                         for item in content:
                             if isinstance(item, dict) and item.get("type") == "text":
-                                logger.debug(f"[CLAUDE-SYSTEM-PROMPT-{req_id}] {item.get('text', '')}")
+                                logger.debug("[CLAUDE-SYSTEM-PROMPT-%s] %s", req_id, item.get('text', ''))
                 
                 # エラーメッセージの表示
                 elif msg_type == "error":
                     error = message.get("error", {})
-                    logger.error(f"[CLAUDE-ERROR-{req_id}] {error}")
+                    logger.error("[CLAUDE-ERROR-%s] %s", req_id, error)
                     # エラーの詳細をデバッグログに出力
-                    logger.debug(f"[CLAUDE-ERROR-DETAIL-{req_id}] {json.dumps(error, ensure_ascii=False, indent=2)}")
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("[CLAUDE-ERROR-DETAIL-%s] %s", req_id, format_json_for_log(error))
                 
                 # その他のメッセージタイプ
                 else:
-                    logger.debug(f"[CLAUDE-OTHER-{req_id}] type: {msg_type}")
+                    logger.debug("[CLAUDE-OTHER-%s] type: %s", req_id, msg_type)
                     
         except Exception as e:
-            logger.error(f"Claudeメッセージ処理エラー (req_id: {req_id}): {e}")
-            logger.debug(f"[CLAUDE-PROCESS-ERROR-{req_id}] {traceback.format_exc()}")
+            logger.error("Claudeメッセージ処理エラー (req_id: %s): %s", req_id, e)
+            logger.debug("[CLAUDE-PROCESS-ERROR-%s] 詳細", req_id, exc_info=True)
+        
+        return message
     
     def _check_usage_limit(self, message: Dict[str, Any]) -> bool:
         """
@@ -549,22 +896,23 @@ class ClaudeManagerThread:
             bool: usage limitが検出された場合True
         """
         try:
-            if isinstance(message, dict):
+            if type(message) is dict:
                 # エラーメッセージのチェック
-                error_msg = str(message.get("error", "")).lower()
-                if "usage limit" in error_msg or "rate limit" in error_msg:
+                # 大半のメッセージはerrorを持たないため、その場合は文字列への変換も判定もしない
+                error = message.get("error")
+                if error and contains_usage_limit(str(error)):
                     return True
                 
-                # contentのチェック
+                # contentのチェック（assistantメッセージのみ）
+                # _process_claude_message()と同様に、要素ごとの判定はtype()の比較とget()で済ませる
                 if message.get("type") == "assistant":
-                    msg_data = message.get("message", {})
-                    content_list = msg_data.get("content", [])
-                    
-                    for content_item in content_list:
-                        if isinstance(content_item, dict) and content_item.get("type") == "text":
-                            text = content_item.get("text", "").lower()
-                            if "usage limit" in text or "rate limit" in text:
-                                return True
+                    msg_data = message.get("message")
+                    content_list = msg_data.get("content") if type(msg_data) is dict else None
+                    if type(content_list) is list:
+                        for content_item in content_list:
+                            if type(content_item) is dict and content_item.get("type") == "text":
+                                if contains_usage_limit(content_item.get("text", "")):
+                                    return True
                                 
         except Exception as e:
             logger.debug(f"usage limitチェックエラー: {e}")
@@ -583,33 +931,39 @@ class ClaudeManagerThread:
             # /clearコマンドを実行（continueオプション付き）
             # 次にタスク実行依頼を受けた時に、コンテキストがクリアされた
             # クリーンな状態でタスクを実行できるようにする（ドキュメント: 113行目）
-            self.claude_options.continue_conversation = True
+            # （continue_conversationは_initialize_claude_sdk()でTrueに設定済み）
 
             # 非同期処理を同期的に実行
-            # asyncio.run()を使用して新しいイベントループを作成
-            import asyncio
+            # タスク実行スレッドのイベントループを使い回す
             try:
-                async def clear_async():
-                    async for message in query(prompt="/clear", options=self.claude_options):
-                        # /clearコマンドの出力をログに記録
-                        self._process_clear_message(message)
-
-                asyncio.run(clear_async())
+                self._runner.run(self._execute_clear_query())
 
                 # コンテキストはクリアされるが、会話は継続
                 logger.info("コンテキストクリア完了（会話は継続中）")
 
             except Exception as e:
-                logger.error(f"/clearコマンド実行エラー: {e}")
+                logger.error("/clearコマンド実行エラー: %s", e)
                 # エラーが発生しても会話は継続
 
         except Exception as e:
-            logger.error(f"コンテキストクリアエラー: {e}")
+            logger.error("コンテキストクリアエラー: %s", e)
+    
+    async def _execute_clear_query(self):
+        """
+        Claude Code SDKで/clearコマンドを実行
+        """
+        async for message in query(prompt="/clear", options=self.claude_options):
+            # /clearコマンドの出力をログに記録
+            self._process_clear_message(message)
     
     def _process_clear_message(self, message):
         """
         /clearコマンドの出力を処理
         """
+        # 出力はDEBUGログのみのため、出力しない設定であればcontentの走査をしない
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        
         try:
             # Claude SDKのメッセージオブジェクトを処理
             if not isinstance(message, dict):
@@ -618,8 +972,8 @@ class ClaudeManagerThread:
                     content_list = message.message.content
                     for content_item in content_list:
                         if hasattr(content_item, 'type') and content_item.type == 'text':
-                            if hasattr(content_item, 'text') and content_item.text.strip():
-                                logger.debug(f"[CLEAR] {content_item.text}")
+                            if hasattr(content_item, 'text') and content_item.text and not content_item.text.isspace():
+                                logger.debug("[CLEAR] %s", content_item.text)
             else:
                 # 辞書の場合の処理
                 msg_type = message.get("type", "")
@@ -629,10 +983,10 @@ class ClaudeManagerThread:
                     for content_item in content_list:
                         if isinstance(content_item, dict) and content_item.get("type") == "text":
                             text = content_item.get("text", "")
-                            if text.strip():
-                                logger.debug(f"[CLEAR] {text}")
+                            if text and not text.isspace():
+                                logger.debug("[CLEAR] %s", text)
         except Exception as e:
-            logger.debug(f"[CLEAR] メッセージ処理エラー: {e}")
+            logger.debug("[CLEAR] メッセージ処理エラー: %s", e)
 
 
 class TaskWorker:
@@ -642,6 +996,15 @@ class TaskWorker:
     タスク管理マスターと接続し、タスク実行依頼を受信して処理する
     """
     
+    # ClaudeManagerThreadと同様に属性を固定する（属性を追加する場合はここにも追加すること）
+    __slots__ = (
+        "host", "port", "root_dir", "use_opus", "debug_auth", "skip_auth_check",
+        "socket", "worker_id", "_join_frame", "_joined", "running",
+        "_recv_buffer", "_recv_view", "_send_buffer", "claude_manager", "result_queue",
+        "selector", "last_request_time", "request_count",
+        "_wakeup_reader", "_wakeup_writer",
+    )
+    
     def __init__(self, host: str = "localhost", port: int = 34567, 
                  root_dir: Optional[str] = None, use_opus: bool = False, debug_auth: bool = False, skip_auth_check: bool = False):
         """
@@ -662,21 +1025,50 @@ class TaskWorker:
         self.debug_auth = debug_auth
         self.skip_auth_check = skip_auth_check
         
+        # ログ出力用のリスナースレッドを起動（main()から起動済みの場合は何もしない）
+        _start_log_listener()
+        
         # ネットワーク関連
         self.socket: Optional[socket.socket] = None
         self.worker_id: str = ""
+        # ワーカーIDの確定時に作成する参入メッセージのフレーム（接続ごとに1回だけ変換する）
+        self._join_frame: bytes = b""
+        # 参入応答（JOIN_ACK）を受信済みかどうか（参入していない接続には離脱メッセージを送らない）
+        self._joined = False
         self.running = True
-        self._recv_buffer = ""
+        self._recv_buffer = bytearray()
+        # recv_into()の受信先（受信のたびに64KiBのbytesオブジェクトを生成しないよう、1回だけ確保して使い回す）
+        self._recv_view = memoryview(bytearray(65536))
+        # 送信待ちのフレーム（メインループの1回の処理で生じた応答・結果報告をまとめ、1回のsend()で送信する）
+        self._send_buffer = bytearray()
         
         # Claude管理スレッド
         self.claude_manager: Optional[ClaudeManagerThread] = None
         
         # メッセージキュー（Claude管理スレッドからの結果）
-        self.result_queue = []
-        self.result_lock = threading.Lock()
+        # SimpleQueueはC実装のスレッドセーフなキューのため、ロックを取らずに追加・取り出しができる
+        self.result_queue: queue.SimpleQueue = queue.SimpleQueue()
+        
+        # ソケットの読み込み可能状態の監視（Linuxではepoll）
+        # タスク管理マスターとのソケットと通知用のソケットを登録し、どちらかの準備ができるまでメインループを待たせる
+        self.selector = selectors.DefaultSelector()
+        
+        # 別スレッド（タスク実行スレッド）やシグナルハンドラから、select()で待っているメインループを起こすためのソケット対
+        # （tools/task_master.pyの_wakeup_reader/_wakeup_writerと同じ）
+        self._wakeup_reader, self._wakeup_writer = socket.socketpair()
+        self._wakeup_reader.setblocking(False)
+        self._wakeup_writer.setblocking(False)
+        self.selector.register(self._wakeup_reader, selectors.EVENT_READ)
+        
+        # シグナル受信時にCレベルでwakeup用ソケットへ1バイト書き込ませる
+        # Pythonのシグナルハンドラはメインスレッドがバイトコードを実行するまで走らないため、
+        # select()で止まっているメインループは、このバイトでまず起こされ、その後ハンドラが実行される
+        # （書き込み側は非ブロッキングなので、未読のバイトが溜まっていても書き込みで止まらない）
+        signal.set_wakeup_fd(self._wakeup_writer.fileno(), warn_on_full_buffer=False)
         
         # REQUESTメッセージ受信追跡
-        self.last_request_time = None
+        # 受信時刻は経過時間の計算にのみ使うため、時計合わせで戻らないtime.monotonic()の値を保持する
+        self.last_request_time: Optional[float] = None
         self.request_count = 0
         
         # シグナルハンドラ設定
@@ -689,11 +1081,27 @@ class TaskWorker:
         """
         logger.info("終了シグナルを受信しました")
         self.running = False
+        self._wakeup()
         
         # Claude管理スレッドの強制停止（ドキュメント: 55行目）
         if self.claude_manager:
             self.claude_manager.stop()
     
+    def _wakeup(self):
+        """select()で待っているメインループを起こす"""
+        try:
+            self._wakeup_writer.send(b"\0")
+        except OSError:
+            pass  # 既に未処理の通知が溜まっている（BlockingIOError）、または終了処理済み
+    
+    def _drain_wakeup(self):
+        """メインループを起こすための通知を読み捨てる"""
+        try:
+            while self._wakeup_reader.recv(4096):
+                pass
+        except OSError:
+            pass  # 読み捨て完了（BlockingIOError）
+    
     def start(self):
         """
         タスクワーカーを開始
@@ -708,8 +1116,7 @@ class TaskWorker:
             self._main_loop()
             
         except Exception as e:
-            logger.error(f"タスクワーカーエラー: {e}")
-            logger.error(traceback.format_exc())
+            logger.exception(f"タスクワーカーエラー: {e}")
         finally:
             self._cleanup()
     
@@ -717,12 +1124,17 @@ class TaskWorker:
         """
         準備処理（ドキュメント: 15行目）
         """
-        # Claude管理スレッドを非同期的に立ち上げ（ドキュメント: 17行目）
-        self._start_claude_manager()
+        # Claude Code SDKを利用できない場合は、タスク管理マスターに接続せずに終了する（ドキュメント: 17行目）
+        ClaudeManagerThread.check_environment()
         
         # タスク管理マスターとのTCP接続を確立（ドキュメント: 18行目）
+        # ワーカーIDは送信元ポート番号で決まるため、Claude管理スレッドより先に接続する
         self._connect_to_master()
         
+        # Claude管理スレッドを非同期的に立ち上げ（ドキュメント: 17行目）
+        # 確定したワーカーIDを渡して生成し、起動後にスレッドの属性を書き換えないようにする
+        self._start_claude_manager()
+        
         # 参入処理（ドキュメント: 18行目）
         self._join_master()
     
@@ -731,9 +1143,8 @@ class TaskWorker:
         Claude管理スレッドを非同期的に立ち上げ（ドキュメント: 17行目）
         """
         try:
-            # ワーカーIDは後で設定されるため、一時的に空文字列で初期化
             self.claude_manager = ClaudeManagerThread(
-                worker_id="",  # 後でTCP接続時に設定
+                worker_id=self.worker_id,  # _connect_to_master()で確定済み
                 root_dir=str(self.root_dir),
                 use_opus=self.use_opus,
                 debug_auth=self.debug_auth,
@@ -767,16 +1178,19 @@ class TaskWorker:
             self.socket.connect((self.host, self.port))
             logger.debug(f"マスターに接続完了: {self.host}:{self.port}")
             
+            # 接続後はノンブロッキングで扱う
+            # 受信はセレクタの通知ごとに受信済みのデータがなくなるまでrecv()を繰り返し、
+            # 送信は_sendall()で書き込み可能になるのを待つ（参入応答待ちも_recv_exactly()で期限付きで待つ）
+            self.socket.setblocking(False)
+            
             # ワーカーIDを送信元ポート番号から生成（ドキュメント: 20行目）
             local_addr = self.socket.getsockname()
             remote_addr = self.socket.getpeername()
             local_port = local_addr[1]
             self.worker_id = str(local_port)
             
-            # Claude管理スレッドにワーカーIDを設定
-            if self.claude_manager:
-                self.claude_manager.worker_id = self.worker_id
-                logger.debug(f"Claude管理スレッドにワーカーIDを設定: {self.worker_id}")
+            # 参入メッセージの内容はワーカーIDだけで決まるため、ここでフレームまで変換しておく
+            self._join_frame = encode_message({"type": "JOIN", "msg": self.worker_id})
             
             logger.info(f"タスク管理マスターに接続 (ワーカーID: {self.worker_id})")
             logger.debug(f"ローカルアドレス: {local_addr}, リモートアドレス: {remote_addr}")
@@ -790,41 +1204,130 @@ class TaskWorker:
         参入処理（ドキュメント: 18行目）
         """
         # 参入メッセージ送信（ドキュメント: 20行目）
-        join_message = {
-            "type": "JOIN",
-            "msg": self.worker_id
-        }
-        
+        # フレームは_connect_to_master()でワーカーIDの確定時に変換済み
         try:
-            message_data = json.dumps(join_message) + '\n'
-            logger.debug(f"送信する参入メッセージ: {repr(message_data)}")
-            
-            bytes_sent = self.socket.send(message_data.encode('utf-8'))
-            logger.info(f"参入メッセージを送信しました ({bytes_sent}バイト)")
+            logger.debug(f"送信する参入メッセージ: {repr(self._join_frame)}")
+            self._sendall(self._join_frame)
+            logger.info(f"参入メッセージを送信しました ({len(self._join_frame)}バイト)")
             
             # 参入応答メッセージ待ち（ドキュメント: 22行目）
-            self.socket.settimeout(10.0)
+            # 参入応答全体を10秒以内に受信できなければタイムアウトとする
+            deadline = time.monotonic() + 10.0
             logger.debug("参入応答メッセージ待ち中...")
             
-            response_data = self.socket.recv(1024).decode('utf-8')
+            # 参入応答の後に続けて届いたメッセージを失わないよう、フレーム1つ分だけを受信する
+            (length,) = MESSAGE_HEADER.unpack(self._recv_exactly(MESSAGE_HEADER.size, deadline))
+            if length > MAX_MESSAGE_SIZE:
+                raise Exception(f"参入応答メッセージが大きすぎます ({length}バイト)")
+            response_data = self._recv_exactly(length, deadline)
             logger.debug(f"受信した参入応答: {repr(response_data)}")
             
-            if response_data:
-                response = json.loads(response_data.strip())
-                logger.debug(f"解析した参入応答: {response}")
-                
-                if response.get("type") == "JOIN_ACK":
-                    logger.info("参入応答メッセージを受信しました")
-                    self.socket.settimeout(None)
-                else:
-                    raise Exception(f"無効な参入応答: {response}")
+            response = decode_message(response_data)
+            logger.debug(f"解析した参入応答: {response}")
+            
+            if response.get("type") == "JOIN_ACK":
+                self._joined = True
+                logger.info("参入応答メッセージを受信しました")
             else:
-                raise Exception("参入応答メッセージが受信できませんでした")
+                raise Exception(f"無効な参入応答: {response}")
                 
         except Exception as e:
             logger.error(f"参入処理エラー: {e}")
             raise
     
+    def _send_message(self, message: Dict[str, Any]) -> int:
+        """
+        タスク管理マスターへのメッセージをフレームに変換し、送信待ちに追加
+        
+        Args:
+            message: 送信するメッセージ
+            
+        Returns:
+            追加したバイト数（フレームヘッダを含む）
+        """
+        data = encode_message(message)
+        self._queue_frame(data)
+        return len(data)
+    
+    def _queue_frame(self, frame: bytes):
+        """
+        変換済みのフレームを送信待ちに追加
+        
+        メインループ中の送信はすべてこのメソッドを通し、実際の送信は_flush_send_buffer()で行う。
+        同じタイミングで受信したCHECKとREQUESTへの応答や、その間に完了したタスクの結果報告を
+        1回のsend()にまとめ、メッセージごとのシステムコールを減らす。
+        
+        Args:
+            frame: フレームヘッダとJSON本体を連結したバイト列
+        """
+        self._send_buffer += frame
+    
+    def _flush_send_buffer(self):
+        """
+        送信待ちのフレームをまとめて送信する
+        """
+        if not self._send_buffer:
+            return
+        # 送信中に例外が起きてもバッファを再利用できるよう、新しいバッファと入れ替えてから送信する
+        data, self._send_buffer = self._send_buffer, bytearray()
+        self._sendall(data)
+    
+    def _sendall(self, data: bytes):
+        """
+        データを全て送信する
+        
+        send()は一部しか送信できない場合があるため、全体を送信するまでsend()を繰り返す。
+        ソケットはノンブロッキングのため、sendall()は使わず、
+        送信バッファに空きがない場合は書き込み可能になるまで待つ。
+        
+        Args:
+            data: 送信するデータ
+            
+        Raises:
+            TimeoutError: 10秒以内に書き込み可能にならなかった場合
+        """
+        view = memoryview(data)
+        while view:
+            try:
+                sent = self.socket.send(view)
+            except BlockingIOError:
+                _, writable, _ = select.select([], [self.socket], [], 10.0)
+                if not writable:
+                    raise TimeoutError("タスク管理マスターへの送信がタイムアウトしました")
+                continue
+            view = view[sent:]
+    
+    def _recv_exactly(self, size: int, deadline: float) -> bytes:
+        """
+        指定したバイト数を受信するまでrecv()を繰り返す
+        
+        ソケットはノンブロッキングのため、受信済みのデータがない場合は読み込み可能になるまで待つ。
+        
+        Args:
+            size: 受信するバイト数
+            deadline: 受信を打ち切る時刻（time.monotonic()の値）
+            
+        Returns:
+            受信したデータ
+            
+        Raises:
+            TimeoutError: 期限までに指定したバイト数を受信できなかった場合
+        """
+        data = bytearray()
+        while len(data) < size:
+            try:
+                chunk = self.socket.recv(size - len(data))
+            except BlockingIOError:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError("参入応答メッセージの受信がタイムアウトしました")
+                select.select([self.socket], [], [], remaining)
+                continue
+            if not chunk:
+                raise Exception("参入応答メッセージが受信できませんでした")
+            data += chunk
+        return bytes(data)
+    
     def _main_loop(self):
         """
         メインループ（ドキュメント: 26行目）
@@ -837,52 +1340,48 @@ class TaskWorker:
         logger.info("メインループを開始（ブロッキング回避設計）")
         loop_count = 0
         
+        # タスク管理マスターとのソケットをセレクタに登録
+        self.selector.register(self.socket, selectors.EVENT_READ)
+        
         while self.running:
             try:
                 loop_count += 1
                 
                 # 1000回ごとにハートビートログ
-                if loop_count % 1000 == 0:
-                    logger.debug(f"[LOOP] メインループ実行中 (回数: {loop_count})")
+                # 内容はすべてDEBUGレベルのため、DEBUGレベルが無効な場合はソケット状態・スレッド数の取得ごと省略する
+                if loop_count % 1000 == 0 and logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("[LOOP] メインループ実行中 (回数: %s)", loop_count)
                     # ソケット状態の確認
                     try:
-                        local_addr = self.socket.getsockname()
-                        remote_addr = self.socket.getpeername()
-                        logger.debug(f"[LOOP] ソケット状態OK: {local_addr} -> {remote_addr}")
+                        logger.debug("[LOOP] ソケット状態OK: %s -> %s", self.socket.getsockname(), self.socket.getpeername())
                     except Exception as e:
-                        logger.error(f"[LOOP] ソケット状態エラー: {e}")
+                        logger.error("[LOOP] ソケット状態エラー: %s", e)
                     
                     # 実行中タスクの確認
-                    active_threads = threading.active_count()
-                    task_threads = [t for t in threading.enumerate() if t.name.startswith('task-')]
-                    logger.debug(f"[LOOP] アクティブスレッド数: {active_threads}, タスクスレッド数: {len(task_threads)}")
-                    if task_threads:
-                        logger.debug(f"[LOOP] 実行中タスク: {[t.name for t in task_threads]}")
-                
-                # タスク管理マスターからのメッセージ受信（ノンブロッキング）
-                self._receive_master_messages()
+                    logger.debug("[LOOP] アクティブスレッド数: %s", threading.active_count())
+                    if self.claude_manager and self.claude_manager.current_req_id:
+                        logger.debug("[LOOP] 実行中タスク: %s", self.claude_manager.current_req_id)
                 
-                # REQUESTメッセージ受信後は受信頻度を上げる
-                current_time = time.time()
-                if self.last_request_time:
-                    time_since_request = current_time - self.last_request_time
-                    if time_since_request < 10.0:  # REQUEST後10秒間は高頻度チェック
-                        # 追加の受信チェック
+                # タスク管理マスターからの受信、またはClaude管理スレッドからの結果通知・終了シグナルを待つ
+                # 一定間隔でのポーリングはせず、イベントが起こるまでselect()で待つ
+                # （待ちを解除するイベントは必ずソケットへの書き込みを伴うため、タイムアウトは不要）
+                for key, _ in self.selector.select():
+                    if key.fileobj is self.socket:
+                        # タスク管理マスターからのメッセージ受信
                         self._receive_master_messages()
+                    else:
+                        # 結果通知・終了シグナルの到着通知（結果は後段でまとめて処理する）
+                        self._drain_wakeup()
                 
-                # Claude管理スレッドからの結果処理（ノンブロッキング）
+                # Claude管理スレッドからの結果処理
                 self._process_claude_results()
                 
-                # 短い間隔でポーリング（長時間ブロッキング防止：ドキュメント26行目）
-                if self.last_request_time and current_time - self.last_request_time < 5.0:
-                    time.sleep(0.001)  # REQUEST後は超高頻度（1ミリ秒）
-                else:
-                    time.sleep(0.05)  # 通常頻度（50ミリ秒）
+                # この回の処理で生じた応答・結果報告をまとめて送信
+                self._flush_send_buffer()
                 
             except Exception as e:
                 if self.running:
-                    logger.error(f"メインループエラー: {e}")
-                    logger.error(traceback.format_exc())
+                    logger.exception(f"メインループエラー: {e}")
                     break
         
         logger.info("メインループを終了")
@@ -893,60 +1392,64 @@ class TaskWorker:
         複数のメッセージをまとめて受信する場合があることを考慮（ドキュメント: 33行目）
         """
         try:
-            # selectを使用してより確実な受信処理
-            import select
-            # REQUESTメッセージ受信後は短いタイムアウトで高頻度チェック
-            current_time = time.time()
-            if self.last_request_time and current_time - self.last_request_time < 5.0:
-                # REQUEST後5秒間は短いタイムアウト（高頻度チェック）
-                timeout = 0.001
-            else:
-                # 通常は長めのタイムアウト
-                timeout = 0.1
-            ready = select.select([self.socket], [], [], timeout)
+            # 受信済みのデータがなくなるまでrecv()を繰り返し、まとめて解析する
+            # （立て続けに届いたCHECK/REQUEST等を、セレクタの1回の通知で処理する）
+            # 受信データは使い回しの領域にrecv_into()で読み込み、受信した分だけバッファに追加する
+            disconnected = False
+            recv_view = self._recv_view
+            while True:
+                try:
+                    received = self.socket.recv_into(recv_view)
+                except BlockingIOError:
+                    break  # 受信済みのデータをすべて読み出した
+                if not received:
+                    disconnected = True
+                    break
+                self._recv_buffer += recv_view[:received]
             
-            if ready[0]:
-                # データが利用可能
-                raw_data = self.socket.recv(65536)  # バッファサイズを増やして確実に受信
-                if raw_data:
-                    data = raw_data.decode('utf-8', errors='replace')
-                    self._recv_buffer += data
-                    logger.debug(f"[RECV] 現在のバッファ長: {len(self._recv_buffer)}")
+            if self._recv_buffer:
+                logger.debug("[RECV] 現在のバッファ長: %s", len(self._recv_buffer))
+                
+                # 「4バイトの長さ＋JSON本体」のフレーム単位で、受信済みのメッセージを処理
+                # 受信途中のフレームはバッファに残し、次回の受信データと合わせて処理する
+                message_count = 0
+                offset = 0
+                while len(self._recv_buffer) - offset >= MESSAGE_HEADER.size:
+                    (length,) = MESSAGE_HEADER.unpack_from(self._recv_buffer, offset)
+                    if length > MAX_MESSAGE_SIZE:
+                        raise Exception(f"メッセージが大きすぎます ({length}バイト)")
+                    end = offset + MESSAGE_HEADER.size + length
+                    if len(self._recv_buffer) < end:
+                        break
+                    body = self._recv_buffer[offset + MESSAGE_HEADER.size:end]
+                    offset = end
                     
-                    # 改行で区切られた複数のJSONメッセージを処理
-                    message_count = 0
-                    while '\n' in self._recv_buffer:
-                        line, self._recv_buffer = self._recv_buffer.split('\n', 1)
-                        line = line.strip()
-                        
-                        if line:
-                            message_count += 1
-                            try:
-                                message = json.loads(line)
-                                logger.info(f"[RECV] 受信メッセージ#{message_count}: {message}")
-                                self._handle_master_message(message)
-                            except json.JSONDecodeError as e:
-                                logger.error(f"[RECV] JSON解析エラー: {e}")
-                                logger.error(f"[RECV] 受信データ行: {repr(line)}")
+                    message_count += 1
+                    try:
+                        message = decode_message(body)
+                    except ValueError as e:
+                        logger.error("[RECV] JSON解析エラー: %s", e)
+                        logger.error("[RECV] 受信データ: %r", bytes(body))
+                        continue
+                    # メッセージ全体（REQUESTではプロンプトテキスト全体）を含むため、DEBUGレベルで出力する
+                    logger.debug("[RECV] 受信メッセージ#%s: %s", message_count, message)
+                    self._handle_master_message(message)
+                del self._recv_buffer[:offset]
+                
+                if message_count > 0:
+                    logger.info("[RECV] 処理したメッセージ数: %s", message_count)
                     
-                    if message_count > 0:
-                        logger.info(f"[RECV] 処理したメッセージ数: {message_count}")
-                        
-                elif raw_data == b'':
-                    # 接続切断（recv()が空バイトを返す）
-                    logger.warning("[RECV] タスク管理マスターとの接続が切断されました（空データ受信）")
-                    self.running = False
-            else:
-                # データなし（正常）
-                pass
+            if disconnected:
+                # 接続切断（recv()が空バイトを返す）
+                logger.warning("[RECV] タスク管理マスターとの接続が切断されました（空データ受信）")
+                self.running = False
                 
         except ConnectionResetError:
             logger.warning("[RECV] タスク管理マスターとの接続がリセットされました")
             self.running = False
         except Exception as e:
             if self.running:
-                logger.error(f"[RECV] マスターメッセージ受信エラー: {e}")
-                logger.error(traceback.format_exc())
+                logger.exception("[RECV] マスターメッセージ受信エラー: %s", e)
                 self.running = False
     
     def _handle_master_message(self, message: Dict[str, Any]):
@@ -959,26 +1462,25 @@ class TaskWorker:
         msg_type = message.get("type")
         req_id = message.get("req_id", "N/A")
         
-        logger.info(f"[HANDLE] メッセージ処理開始: type={msg_type}, req_id={req_id}")
+        logger.info("[HANDLE] メッセージ処理開始: type=%s, req_id=%s", msg_type, req_id)
         
+        # 最も頻繁に届くCHECKを先頭で判定する（if/elifの順序はメッセージの頻度順）
         if msg_type == "CHECK":
             # ヘルスチェック（ドキュメント: 37行目）
-            current_time = time.time()
-            if self.last_request_time:
-                time_since_request = current_time - self.last_request_time
-                logger.info(f"[HANDLE] ヘルスチェック処理開始 (req_id: {req_id}, REQUEST後: {time_since_request:.3f}秒)")
-            else:
-                logger.info(f"[HANDLE] ヘルスチェック処理開始 (req_id: {req_id})")
+            logger.info("[HANDLE] ヘルスチェック処理開始 (req_id: %s)", req_id)
+            # 直前のREQUESTからの経過時間は調査用のため、DEBUGレベルが有効な場合のみ計算する
+            if self.last_request_time and logger.isEnabledFor(logging.DEBUG):
+                logger.debug("[HANDLE] REQUEST後の経過時間: %.3f秒", time.monotonic() - self.last_request_time)
             self._handle_health_check(message)
-            logger.info(f"[HANDLE] ヘルスチェック処理完了 (req_id: {req_id})")
+            logger.info("[HANDLE] ヘルスチェック処理完了 (req_id: %s)", req_id)
         
         elif msg_type == "REQUEST":
             # タスク実行依頼（ドキュメント: 39行目）
-            self.last_request_time = time.time()
+            self.last_request_time = time.monotonic()
             self.request_count += 1
-            logger.info(f"[HANDLE] タスク実行依頼受信 (req_id: {req_id}, count: {self.request_count}, time: {self.last_request_time})")
+            logger.info("[HANDLE] タスク実行依頼受信 (req_id: %s, count: %s)", req_id, self.request_count)
             self._handle_task_request(message)
-            logger.info(f"[HANDLE] タスク実行依頼をClaude管理スレッドに転送 (req_id: {req_id})")
+            logger.info("[HANDLE] タスク実行依頼をClaude管理スレッドに転送 (req_id: %s)", req_id)
         
         elif msg_type == "DISCONNECT":
             # 切断通知（ドキュメント: 51行目）
@@ -986,7 +1488,7 @@ class TaskWorker:
             self.running = False
         
         else:
-            logger.warning(f"[HANDLE] 未知のメッセージタイプ: {msg_type}")
+            logger.warning("[HANDLE] 未知のメッセージタイプ: %s", msg_type)
     
     def _handle_health_check(self, message: Dict[str, Any]):
         """
@@ -997,40 +1499,30 @@ class TaskWorker:
             message: ヘルスチェックメッセージ
         """
         req_id = message.get("req_id")
-        logger.info(f"[CHECK] ヘルスチェック受信 (req_id: {req_id})")
+        logger.info("[CHECK] ヘルスチェック受信 (req_id: %s)", req_id)
         
         # 即時応答（ドキュメント: 37行目）
-        check_ack = {
-            "type": "CHECK_ACK",
-            "msg": "",
-            "req_id": req_id
-        }
-        
         try:
-            message_data = json.dumps(check_ack) + '\n'
-            logger.debug(f"[CHECK] 送信するヘルスチェック応答: {repr(message_data)}")
-            
-            bytes_sent = self.socket.send(message_data.encode('utf-8'))
+            message_data = encode_check_ack_message(req_id)
+            logger.debug("[CHECK] 送信するヘルスチェック応答: %r", message_data)
+            # 送信はメインループのこの回の処理の最後にまとめて行う
+            # （TCP_NODELAYは接続時に設定済みのため、小さな応答メッセージも送信時に即座に送出される）
+            self._queue_frame(message_data)
+            bytes_sent = len(message_data)
             
-            # 即座に送信バッファをフラッシュ
-            try:
-                self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
-            except:
-                pass
-                
-            logger.info(f"[CHECK] ヘルスチェック応答送信完了 (req_id: {req_id}, {bytes_sent}バイト)")
+            logger.info("[CHECK] ヘルスチェック応答を送信待ちに追加 (req_id: %s, %sバイト)", req_id, bytes_sent)
             
-            # 送信直後のソケット状態確認
-            try:
-                local_addr = self.socket.getsockname()
-                remote_addr = self.socket.getpeername()
-                logger.debug(f"[CHECK] 送信後ソケット状態: {local_addr} -> {remote_addr}")
-            except Exception as sock_e:
-                logger.error(f"[CHECK] 送信後ソケット状態エラー: {sock_e}")
+            # ソケット状態確認（アドレス取得のシステムコールを避けるため、DEBUGログ出力時のみ）
+            if logger.isEnabledFor(logging.DEBUG):
+                try:
+                    local_addr = self.socket.getsockname()
+                    remote_addr = self.socket.getpeername()
+                    logger.debug("[CHECK] ソケット状態: %s -> %s", local_addr, remote_addr)
+                except Exception as sock_e:
+                    logger.error("[CHECK] ソケット状態エラー: %s", sock_e)
                 
         except Exception as e:
-            logger.error(f"[CHECK] ヘルスチェック応答エラー: {e}")
-            logger.error(traceback.format_exc())
+            logger.exception("[CHECK] ヘルスチェック応答エラー: %s", e)
     
     def _handle_task_request(self, message: Dict[str, Any]):
         """
@@ -1044,29 +1536,19 @@ class TaskWorker:
         req_id = message.get("req_id")
         prompt_text = message.get("msg", "")
         
-        logger.info(f"[REQUEST] タスク実行依頼を受信 (req_id: {req_id})")
+        logger.info("[REQUEST] タスク実行依頼を受信 (req_id: %s)", req_id)
         
         # 即時に承諾応答（ドキュメント: 39行目）
-        request_ack = {
-            "type": "REQUEST_ACK",
-            "msg": "",
-            "req_id": req_id
-        }
-        
         try:
-            message_data = json.dumps(request_ack) + '\n'
-            bytes_sent = self.socket.send(message_data.encode('utf-8'))
+            request_ack = encode_request_ack_message(req_id)
+            # 送信はメインループのこの回の処理の最後にまとめて行う
+            self._queue_frame(request_ack)
+            bytes_sent = len(request_ack)
             
-            # 即座に送信バッファをフラッシュ
-            try:
-                self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
-            except:
-                pass
-                
-            logger.info(f"[REQUEST] タスク実行依頼承諾送信完了 (req_id: {req_id}, {bytes_sent}バイト)")
-            logger.debug(f"[REQUEST] 送信した承諾メッセージ: {repr(message_data)}")
+            logger.info("[REQUEST] タスク実行依頼承諾を送信待ちに追加 (req_id: %s, %sバイト)", req_id, bytes_sent)
+            logger.debug("[REQUEST] 送信待ちに追加した承諾メッセージ: %r", request_ack)
         except Exception as e:
-            logger.error(f"[REQUEST] タスク実行依頼承諾エラー: {e}")
+            logger.error("[REQUEST] タスク実行依頼承諾エラー: %s", e)
             return
         
         # Claude管理スレッドにタスク実行依頼を渡す（ドキュメント: 39行目）
@@ -1078,9 +1560,9 @@ class TaskWorker:
                 "req_id": req_id,
                 "task_filename": task_filename
             })
-            logger.info(f"タスク実行依頼をClaude管理スレッドに送信 (req_id: {req_id})")
-            logger.debug(f"メインループは継続してヘルスチェックを受信可能")
-            logger.info(f"[HANDLE] REQUEST_ACK送信完了、タスクは非同期実行中 (req_id: {req_id})")
+            logger.info("タスク実行依頼をClaude管理スレッドに送信 (req_id: %s)", req_id)
+            logger.debug("メインループは継続してヘルスチェックを受信可能")
+            logger.info("[HANDLE] REQUEST_ACKを送信待ちに追加、タスクは非同期実行中 (req_id: %s)", req_id)
     
     def _handle_claude_result(self, result: Dict[str, Any]):
         """
@@ -1089,18 +1571,20 @@ class TaskWorker:
         Args:
             result: Claude管理スレッドからの結果
         """
-        with self.result_lock:
-            self.result_queue.append(result)
+        self.result_queue.put_nowait(result)
+        
+        # メインループのselect()の待ちを解除する
+        self._wakeup()
     
     def _process_claude_results(self):
         """
         Claude管理スレッドからのタスク完了通知を処理（ドキュメント: 45行目）
         """
-        with self.result_lock:
-            results = self.result_queue.copy()
-            self.result_queue.clear()
-        
-        for result in results:
+        while True:
+            try:
+                result = self.result_queue.get_nowait()
+            except queue.Empty:
+                break
             self._send_task_result(result)
     
     def _send_task_result(self, result: Dict[str, Any]):
@@ -1129,13 +1613,12 @@ class TaskWorker:
                     "msg": task_filename
                 }
             
-            message_data = json.dumps(result_message) + '\n'
-            self.socket.send(message_data.encode('utf-8'))
+            self._send_message(result_message)
             
-            logger.info(f"[RESULT] タスク結果報告をマスターに送信: {result_type} (req_id: {req_id}, task: {task_filename})")
+            logger.info("[RESULT] タスク結果報告を送信待ちに追加: %s (req_id: %s, task: %s)", result_type, req_id, task_filename)
             
         except Exception as e:
-            logger.error(f"タスク結果報告エラー: {e}")
+            logger.error("タスク結果報告エラー: %s", e)
     
     def _cleanup(self):
         """
@@ -1150,17 +1633,28 @@ class TaskWorker:
         # タスク管理マスターとの接続を切断（ドキュメント: 53行目）
         if self.socket:
             try:
-                # 離脱メッセージ送信
-                leave_message = {"type": "LEAVE", "msg": ""}
-                message_data = json.dumps(leave_message) + '\n'
-                self.socket.send(message_data.encode('utf-8'))
+                # 離脱メッセージ送信（送信待ちの結果報告があれば、それと合わせて送信する）
+                # 参入前（Claude管理スレッドの起動失敗・参入応答待ちでのエラー）の場合は、
+                # マスター側では参入待ちの接続のため、離脱メッセージは送らずに切断のみ行う
+                if self._joined:
+                    self._queue_frame(_LEAVE_FRAME)
+                    self._flush_send_buffer()
                 
                 self.socket.close()
                 logger.info("タスク管理マスターとの接続を切断しました")
             except Exception as e:
                 logger.error(f"接続切断エラー: {e}")
         
+        # wakeup用ソケットを閉じる前に、シグナル受信時の書き込み先登録を解除する
+        signal.set_wakeup_fd(-1)
+        self.selector.close()
+        self._wakeup_reader.close()
+        self._wakeup_writer.close()
+        
         logger.info("ワーカー終了処理を完了しました")
+        
+        # キューに残ったログを書き出し、ログ出力用のリスナースレッドを停止
+        _stop_log_listener()
 
 
 def main():
@@ -1218,6 +1712,9 @@ def main():
     
     args = parser.parse_args()
     
+    # ログ出力用のリスナースレッドを起動（TaskWorkerの生成前のログも同じ形式で出力する）
+    _start_log_listener()
+    
     # デバッグモードでログレベルを変更
     if args.debug:
         logging.getLogger().setLevel(logging.DEBUG)
@@ -1238,8 +1735,7 @@ def main():
     except KeyboardInterrupt:
         logger.info("Ctrl-Cで終了")
     except Exception as e:
-        logger.error(f"予期しないエラー: {e}")
-        logger.error(traceback.format_exc())
+        logger.exception(f"予期しないエラー: {e}")
         sys.exit(1)
 
 